@@ -10,9 +10,8 @@ import sys
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from src.prompt_generator import PromptGenerator, GeneratedPrompt
-from src.database import PromptDatabase
-from src.task_classifier import TaskClassifier
+from src.prompt_generator import GeneratedPrompt
+from src.shared import get_database, get_generator
 import config
 
 
@@ -25,11 +24,13 @@ st.set_page_config(
 )
 
 # Initialize session state
+# Sessions hold references to the process-wide generator and database
+# instead of building their own
 if 'db' not in st.session_state:
-    st.session_state.db = PromptDatabase(config.DATABASE_URL)
+    st.session_state.db = get_database()
 
 if 'generator' not in st.session_state:
-    st.session_state.generator = PromptGenerator(config.TEMPLATES_DIR)
+    st.session_state.generator = get_generator()
 
 if 'current_prompt_id' not in st.session_state:
     st.session_state.current_prompt_id = None
@@ -62,7 +63,7 @@ def main():
                 st.write("**סוגי משימות:**")
                 for task_type in stats["intents"]:
                     emoji = {"visual": "🎨", "textual": "📝", "technical": "💻"}.get(task_type, "📋")
-                    st.write(f"{emoji} {task_type}")
+                    st.write(f"{emoji} {task_type} ({stats['by_intent'][task_type]['prompts']})")
         except Exception as e:
             st.error(f"שגיאה בטעינת סטטיסטיקות: {e}")
 
@@ -71,6 +72,9 @@ def main():
         # View History
         if st.button("📜 הצג היסטוריה", use_container_width=True):
             st.session_state.show_history = True
+            # Start again from the newest prompts
+            st.session_state.history_records = None
+            st.session_state.history_cursor = None
 
         # Available Templates
         with st.expander("📋 טמפלטים זמינים"):
@@ -88,7 +92,6 @@ def main():
         st.header("📝 קלט")
 
         # Task type selector (optional override)
-        classifier = TaskClassifier()
         task_types_hebrew = {
             "אוטומטי (זיהוי אוטומטי)": None,
             "🎨 חזותי (Visual)": "visual",
@@ -163,7 +166,9 @@ def main():
                         detected_intent=result.task_type,
                         generated_prompt=result.prompt,
                         detected_style=str(result.metadata.get("style", {})),
-                        metadata=result.metadata
+                        metadata=result.metadata,
+                        template_version=result.template_version,
+                        variables=result.variables
                     )
 
                     # Store in session
@@ -290,7 +295,12 @@ def main():
         st.header("📜 היסטוריית פרומפטים")
 
         try:
-            history = st.session_state.db.get_prompt_history(limit=20)
+            # Pages are fetched on demand; earlier pages stay in the session
+            if st.session_state.get('history_records') is None:
+                page = st.session_state.db.get_prompt_history_page(limit=config.HISTORY_PAGE_SIZE)
+                st.session_state.history_records = page["prompts"]
+                st.session_state.history_cursor = page["next_cursor"]
+            history = st.session_state.history_records
 
             if history:
                 for record in history:
@@ -316,6 +326,14 @@ def main():
                         st.write("**פרומפט שנוצר:**")
                         st.code(record['generated_prompt'][:300] + "..." if len(record['generated_prompt']) > 300 else record['generated_prompt'])
 
+                if st.session_state.history_cursor and st.button("⬇️ טען עוד"):
+                    page = st.session_state.db.get_prompt_history_page(
+                        limit=config.HISTORY_PAGE_SIZE, cursor=st.session_state.history_cursor
+                    )
+                    st.session_state.history_records = history + page["prompts"]
+                    st.session_state.history_cursor = page["next_cursor"]
+                    st.rerun()
+
             else:
                 st.info("אין עדיין היסטוריה")
 
@@ -324,6 +342,7 @@ def main():
 
         if st.button("סגור היסטוריה"):
             st.session_state.show_history = False
+            st.session_state.history_records = None
             st.rerun()
 
     # Footer
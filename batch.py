@@ -0,0 +1,320 @@
+"""
+Batch pipeline for Engineered Prompt
+Streams Hebrew requests from JSONL or CSV through the prompt generator into a JSONL file
+
+Usage:
+    python batch.py requests.jsonl -o prompts.jsonl --checkpoint run.ckpt
+    cat requests.csv | python batch.py - --format csv --workers 4 --mode process --save-to-db
+"""
+import argparse
+import contextlib
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.prompt_generator import BatchResult, PromptGenerator
+from src.database import PromptDatabase
+import config
+
+REQUEST_FIELDS = ("hebrew_text", "context", "instructions", "override_task")
+
+
+def read_requests(stream: TextIO, input_format: str) -> Iterator[Any]:
+    """
+    Lazily read request records from a stream.
+
+    JSONL lines may hold an object with REQUEST_FIELDS or a plain JSON string;
+    CSV files need a hebrew_text column. A malformed line yields the ValueError
+    in its place so offsets stay aligned with the input records.
+    """
+    if input_format == "csv":
+        yield from csv.DictReader(stream)
+        return
+
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+
+
+def to_item(record: Any) -> Dict[str, str]:
+    """Normalize an input record into a generate_batch item."""
+    if isinstance(record, Exception):
+        raise record
+    if isinstance(record, str):
+        record = {"hebrew_text": record}
+    if not isinstance(record, dict) or not record.get("hebrew_text"):
+        raise ValueError("Record has no hebrew_text")
+    return {field: record[field] for field in REQUEST_FIELDS if record.get(field)}
+
+
+def read_checkpoint(path: Optional[Path]) -> int:
+    """Number of input records already processed according to a checkpoint file."""
+    if path is None or not path.exists():
+        return 0
+    return json.loads(path.read_text(encoding="utf-8"))["offset"]
+
+
+def read_run_id(path: Optional[Path]) -> Optional[str]:
+    """Run identifier stored in a checkpoint file (None if there is none)."""
+    if path is None or not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8")).get("run_id")
+
+
+def write_checkpoint(path: Path, offset: int, run_id: Optional[str] = None) -> None:
+    """Atomically record how many input records have been processed (and by which run)."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(json.dumps({"offset": offset, "run_id": run_id}), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def process_batch(
+    generator: PromptGenerator,
+    records: Sequence[Any],
+    offset: int,
+    workers: int = 1,
+    mode: str = "thread",
+    db: Optional[PromptDatabase] = None,
+    executor: Optional[Executor] = None,
+    run_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Generate prompts for one batch of input records.
+
+    Args:
+        generator: Prompt generator
+        records: Raw records from read_requests
+        offset: Input offset of the first record
+        workers: Worker threads/processes for generate_batch
+        mode: "thread" or "process"
+        db: If given, successful prompts are bulk-saved
+        executor: Worker pool from generator.batch_executor shared across batches
+        run_id: Run identifier; saved rows are keyed by it and their input
+            offset, so saving a batch again returns the existing rows
+
+    Returns:
+        One output record per input record: offset plus the generated prompt or
+        an error (and db_error if only saving it failed)
+    """
+    results: List[Optional[BatchResult]] = [None] * len(records)
+    items = []
+    positions = []
+    for position, record in enumerate(records):
+        try:
+            items.append(to_item(record))
+            positions.append(position)
+        except ValueError as e:
+            results[position] = BatchResult(error=f"ValueError: {e}")
+
+    for position, result in zip(positions, generator.generate_batch(items, workers=workers, mode=mode, executor=executor)):
+        results[position] = result
+
+    prompt_ids: Dict[int, Optional[int]] = {}
+    save_errors: Dict[int, str] = {}
+    if db is not None:
+        saved = [position for position, result in enumerate(results) if result.ok]
+        saved_result = db.save_prompts_bulk([
+            {
+                "input_text": results[position].prompt.input_text,
+                "detected_intent": results[position].prompt.task_type,
+                "generated_prompt": results[position].prompt.prompt,
+                "detected_style": str(results[position].prompt.metadata.get("style", {})),
+                "metadata": results[position].prompt.metadata,
+                "template_version": results[position].prompt.template_version,
+                "variables": results[position].prompt.variables,
+                "source_key": f"{run_id}:{offset + position}" if run_id else None
+            }
+            for position in saved
+        ])
+        prompt_ids = dict(zip(saved, saved_result.ids))
+        save_errors = {saved[index]: error for index, error in saved_result.errors.items()}
+
+    output = []
+    for position, result in enumerate(results):
+        if not result.ok:
+            output.append({"offset": offset + position, "error": result.error})
+            continue
+
+        prompt = result.prompt
+        output_record = {
+            "offset": offset + position,
+            "hebrew_text": prompt.input_text,
+            "task_type": prompt.task_type,
+            "template_used": prompt.template_used,
+            "template_version": prompt.template_version,
+            "confidence": prompt.confidence,
+            "variables": prompt.variables,
+            "prompt": prompt.prompt
+        }
+        if prompt_ids.get(position) is not None:
+            output_record["prompt_id"] = prompt_ids[position]
+        if position in save_errors:
+            output_record["db_error"] = save_errors[position]
+        output.append(output_record)
+    return output
+
+
+def run(
+    generator: PromptGenerator,
+    source: TextIO,
+    sink: TextIO,
+    input_format: str = "jsonl",
+    start_offset: int = 0,
+    batch_size: int = 1000,
+    workers: int = 1,
+    mode: str = "thread",
+    db: Optional[PromptDatabase] = None,
+    checkpoint: Optional[Path] = None,
+    run_id: Optional[str] = None,
+    progress: Optional[TextIO] = sys.stderr
+) -> Dict[str, Any]:
+    """
+    Stream requests from source to sink in bounded batches.
+
+    Only one batch is held in memory at a time. After each batch the output
+    is flushed before the checkpoint is advanced, so an interrupted run can
+    resume from the checkpoint without losing results (at most the last
+    batch is written twice to the output). Database rows are keyed by run_id
+    and input offset, so the replayed batch is not saved twice. With
+    workers > 1 one worker pool serves every batch.
+
+    Args:
+        generator: Prompt generator
+        source: Input stream (JSONL or CSV)
+        sink: Output stream for JSONL results
+        input_format: "jsonl" or "csv"
+        start_offset: Number of input records to skip
+        batch_size: Records generated, written and checkpointed together
+        workers: Worker threads/processes for generate_batch
+        mode: "thread" or "process"
+        db: If given, successful prompts are saved to this database
+        checkpoint: File updated with the next offset after every batch
+        run_id: Identifier of the run being started or resumed (see process_batch)
+        progress: Stream for throughput reports (None = silent)
+
+    Returns:
+        Run statistics (processed, errors, seconds, rate, next offset)
+    """
+    records = itertools.islice(read_requests(source, input_format), start_offset, None)
+    offset = start_offset
+    processed = 0
+    errors = 0
+    started = time.perf_counter()
+
+    with contextlib.ExitStack() as stack:
+        executor = stack.enter_context(generator.batch_executor(workers, mode)) if workers > 1 else None
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                break
+
+            for output_record in process_batch(generator, batch, offset, workers, mode, db, executor, run_id):
+                errors += "error" in output_record
+                sink.write(json.dumps(output_record, ensure_ascii=False) + "\n")
+            sink.flush()
+
+            offset += len(batch)
+            processed += len(batch)
+            if checkpoint is not None:
+                write_checkpoint(checkpoint, offset, run_id)
+
+            if progress is not None:
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{processed} requests ({errors} errors) in {elapsed:.1f}s - {processed / elapsed:.0f} req/s, offset {offset}",
+                    file=progress,
+                    flush=True
+                )
+
+    elapsed = time.perf_counter() - started
+    return {
+        "processed": processed,
+        "errors": errors,
+        "seconds": elapsed,
+        "rate": processed / elapsed if elapsed else 0.0,
+        "offset": offset
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Generate prompts for a file of Hebrew requests")
+    parser.add_argument("input", help="JSONL or CSV file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, or - for stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Input format (default: from the file extension)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--mode", choices=["thread", "process"], default="process")
+    parser.add_argument("--checkpoint", type=Path, help="Resume from and update this checkpoint file")
+    parser.add_argument("--start-offset", type=int, help="Input records to skip (overrides the checkpoint)")
+    parser.add_argument(
+        "--save-to-db",
+        action="store_true",
+        help="Also save generated prompts to the database (resuming from --checkpoint does not save them twice)"
+    )
+    parser.add_argument("--database-url", default=config.DATABASE_URL)
+    args = parser.parse_args(argv)
+
+    input_format = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    start_offset = args.start_offset if args.start_offset is not None else read_checkpoint(args.checkpoint)
+    # A new checkpoint starts a new run; resuming keeps its ID so saved rows are recognized
+    run_id = (read_run_id(args.checkpoint) or uuid.uuid4().hex) if args.checkpoint else None
+
+    from src.shared import build_database, build_generator
+
+    # No template watcher: one run uses one template set
+    generator = build_generator(watch=False)
+    db = build_database(args.database_url) if args.save_to_db else None
+    if db is not None:
+        db.save_template_revisions(generator.registry.revisions())
+
+    if args.input == "-":
+        source = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    else:
+        source = open(args.input, "r", encoding="utf-8", newline="")
+
+    if args.output == "-":
+        sink = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
+    else:
+        # Appending keeps the results of the run being resumed
+        sink = open(args.output, "a" if start_offset else "w", encoding="utf-8")
+
+    with source, sink:
+        stats = run(
+            generator,
+            source,
+            sink,
+            input_format=input_format,
+            start_offset=start_offset,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            mode=args.mode,
+            db=db,
+            checkpoint=args.checkpoint,
+            run_id=run_id
+        )
+
+    print(
+        f"Done: {stats['processed']} requests, {stats['errors']} errors, "
+        f"{stats['rate']:.0f} req/s, next offset {stats['offset']}",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
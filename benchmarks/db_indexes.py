@@ -0,0 +1,126 @@
+"""
+Benchmark of the prompts table read queries with and without the query indexes
+
+Fills a temporary SQLite database, drops the composite indexes to get the old
+schema, prints each query's plan and latency, then lets migrate_schema add the
+indexes back and repeats.
+
+Usage:
+    python benchmarks/db_indexes.py --rows 1000000
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event, text
+
+from src.database import PromptDatabase, PromptRecord, migrate_schema
+
+INTENTS = ("visual", "textual", "technical")
+QUERY_INDEXES = ("ix_prompts_created_at", "ix_prompts_intent_created_at", "ix_prompts_intent_rating", "ix_prompts_rating")
+
+
+def fill(db: PromptDatabase, rows: int, batch_size: int = 50000) -> None:
+    """Insert rows of synthetic prompts spread over a year, a fifth of them rated."""
+    rng = random.Random(0)
+    start = datetime(2025, 1, 1)
+    with db.engine.begin() as connection:
+        for offset in range(0, rows, batch_size):
+            connection.execute(PromptRecord.__table__.insert(), [
+                {
+                    "input_text": f"בקשה מספר {i}",
+                    "detected_intent": rng.choice(INTENTS),
+                    "generated_prompt": f"Prompt {i}",
+                    "rating": float(rng.randint(1, 5)) if rng.random() < 0.2 else None,
+                    "created_at": start + timedelta(seconds=rng.randrange(365 * 24 * 3600))
+                }
+                for i in range(offset, min(offset + batch_size, rows))
+            ])
+
+
+def query_plan(db: PromptDatabase, call: Callable[[], object]) -> List[str]:
+    """Run call once and return the SQLite query plan of the statements it executed."""
+    statements: List[Tuple[str, tuple]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        call()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+    plan = []
+    with db.engine.connect() as connection:
+        for statement, parameters in statements:
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            plan.extend(row[-1] for row in rows)
+    return plan
+
+
+def run_queries(db: PromptDatabase, repeat: int) -> Dict[str, Tuple[float, List[str]]]:
+    """Median latency (ms) and plan of every benchmarked query."""
+    queries = {
+        "history (50 newest)": lambda: db.get_prompt_history(limit=50),
+        "history (visual, 50 newest)": lambda: db.get_prompt_history(limit=50, intent_filter="visual"),
+        "best prompts (textual, >= 4)": lambda: db.get_best_prompts("textual", min_rating=4.0, limit=10),
+        "training examples (>= 5)": lambda: db.get_training_examples(min_rating=5.0),
+    }
+    results = {}
+    for name, call in queries.items():
+        plan = query_plan(db, call)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        results[name] = (sorted(timings)[len(timings) // 2] * 1000, plan)
+    return results
+
+
+def report(title: str, results: Dict[str, Tuple[float, List[str]]]) -> None:
+    print(f"\n{title}")
+    for name, (latency, plan) in results.items():
+        print(f"  {name:30} {latency:9.2f} ms   {' | '.join(plan)}")
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark prompts table indexes")
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PromptDatabase(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        with db.engine.begin() as connection:
+            for name in QUERY_INDEXES:
+                connection.execute(text(f"DROP INDEX {name}"))
+
+        print(f"Filling {args.rows} rows...")
+        fill(db, args.rows)
+        before = run_queries(db, args.repeat)
+
+        started = time.perf_counter()
+        added = migrate_schema(db.engine)
+        migration_seconds = time.perf_counter() - started
+        # Pooled connections keep statements prepared against the old schema
+        db.engine.dispose()
+        after = run_queries(db, args.repeat)
+
+        report("Without query indexes:", before)
+        report(f"With query indexes (migration added {', '.join(added)} in {migration_seconds:.1f}s):", after)
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark of the SQLite connection profiles on insert-heavy and read-heavy workloads
+
+For every profile in SQLITE_PROFILES a fresh database file is filled and
+exercised with:
+    single saves   - threads calling save_prompt (one commit each)
+    bulk import    - save_prompts_bulk
+    reads + writer - threads reading prompts by ID and history pages while
+                     one thread keeps saving
+
+Usage:
+    python benchmarks/sqlite_profiles.py --rows 50000 --threads 4
+"""
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database import SQLITE_PROFILES, PromptDatabase
+
+INTENTS = ("visual", "textual", "technical")
+
+
+def prompt_row(i: int) -> Dict[str, str]:
+    return {
+        "input_text": f"צור תמונה של חתול מספר {i}",
+        "detected_intent": INTENTS[i % len(INTENTS)],
+        "generated_prompt": f"Create a detailed image of cat number {i}. " * 8
+    }
+
+
+def single_saves(db: PromptDatabase, count: int, threads: int) -> float:
+    """Saves per second with each save in its own transaction."""
+    def worker(offset: int) -> None:
+        for i in range(offset, count, threads):
+            db.save_prompt(**prompt_row(i))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return count / (time.perf_counter() - started)
+
+
+def bulk_import(db: PromptDatabase, count: int) -> float:
+    """Rows per second through save_prompts_bulk."""
+    started = time.perf_counter()
+    db.save_prompts_bulk(prompt_row(i) for i in range(count))
+    return count / (time.perf_counter() - started)
+
+
+def reads_with_writer(db: PromptDatabase, threads: int, seconds: float) -> Dict[str, float]:
+    """Reads and writes per second while readers and one writer run concurrently."""
+    highest_id = db.get_prompt_history(limit=1)[0]["id"]
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0}
+    lock = threading.Lock()
+
+    def reader(seed: int) -> None:
+        rng = random.Random(seed)
+        reads = 0
+        while not stop.is_set():
+            if reads % 10:
+                db.get_prompt_by_id(rng.randint(1, highest_id))
+            else:
+                db.get_prompt_history(limit=50, intent_filter=rng.choice(INTENTS))
+            reads += 1
+        with lock:
+            counts["reads"] += reads
+
+    def writer() -> None:
+        writes = 0
+        while not stop.is_set():
+            db.save_prompt(**prompt_row(writes))
+            writes += 1
+        with lock:
+            counts["writes"] += writes
+
+    workers = [threading.Thread(target=reader, args=(seed,)) for seed in range(threads)]
+    workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return {name: count / seconds for name, count in counts.items()}
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark SQLite connection profiles")
+    parser.add_argument("--rows", type=int, default=50000, help="Rows for the bulk import (and read workload)")
+    parser.add_argument("--saves", type=int, default=2000, help="Single-transaction saves")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of the read workload")
+    args = parser.parse_args()
+
+    print(f"{'profile':12} {'saves/s':>10} {'bulk rows/s':>12} {'reads/s':>10} {'writes/s':>10}  (reads with a concurrent writer)")
+    for profile in SQLITE_PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = PromptDatabase(f"sqlite:///{Path(tmp) / 'bench.db'}", sqlite_profile=profile)
+            saves = single_saves(db, args.saves, args.threads)
+            bulk = bulk_import(db, args.rows)
+            mixed = reads_with_writer(db, args.threads, args.seconds)
+            db.close()
+        print(f"{profile:12} {saves:10.0f} {bulk:12.0f} {mixed['reads']:10.0f} {mixed['writes']:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
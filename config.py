@@ -12,9 +12,64 @@ BASE_DIR = Path(__file__).parent
 # Database
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./prompts.db")
 
+# SQLite connection pragmas: a preset (default | durable | throughput, see src.database.SQLITE_PROFILES)
+# with optional per-pragma overrides, e.g. SQLITE_SYNCHRONOUS=NORMAL or SQLITE_MMAP_SIZE=0
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "durable")
+SQLITE_OVERRIDES = {
+    name: os.environ[f"SQLITE_{name.upper()}"]
+    for name in ("journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store", "busy_timeout")
+    if os.getenv(f"SQLITE_{name.upper()}")
+}
+
 # Templates directory
 TEMPLATES_DIR = BASE_DIR / "src" / "templates"
 
+# Prompt storage: "full" stores rendered prompts; "reference" stores template version + variables
+# and renders on read (convert existing rows with: python -m src.database migrate-reference)
+PROMPT_STORAGE_MODE = os.getenv("PROMPT_STORAGE_MODE", "full")
+
+# Keep running per-intent totals in the prompt_stats table so statistics are read, not aggregated
+PROMPT_STATS_TABLE = os.getenv("PROMPT_STATS_TABLE", "false").lower() in ("1", "true", "yes")
+
+# Write-behind saves: queued and committed in batches by a background thread (single writer process only)
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_INTERVAL_MS = float(os.getenv("WRITE_BEHIND_INTERVAL_MS", "50"))
+WRITE_BEHIND_QUEUE_SIZE = int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", "10000"))
+
+# Precompiled templates/lexicons bundle (rebuilt automatically when sources change)
+BUNDLE_PATH = Path(os.getenv("BUNDLE_PATH", str(BASE_DIR / "compiled_bundle.pkl")))
+
+# Task classifier backend: "rules" (keyword TaskClassifier), "naive_bayes" (trained model)
+# or "cascade" (rules, falling back to the model for ambiguous inputs)
+CLASSIFIER_BACKEND = os.getenv("CLASSIFIER_BACKEND", "rules")
+CLASSIFIER_MODEL_PATH = Path(os.getenv("CLASSIFIER_MODEL_PATH", str(BASE_DIR / "task_model.npz")))
+CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.3"))
+CASCADE_MIN_MARGIN = float(os.getenv("CASCADE_MIN_MARGIN", "0.2"))
+
+# Generation cache (0 disables caching)
+GENERATION_CACHE_SIZE = int(os.getenv("GENERATION_CACHE_SIZE", "0"))
+GENERATION_CACHE_TTL = float(os.getenv("GENERATION_CACHE_TTL", "0")) or None
+
+# Persistent generation cache tier (SQLite file shared across restarts and processes; empty disables)
+PERSISTENT_CACHE_PATH = os.getenv("PERSISTENT_CACHE_PATH", "")
+PERSISTENT_CACHE_SIZE = int(os.getenv("PERSISTENT_CACHE_SIZE", "100000"))
+PERSISTENT_CACHE_TTL = float(os.getenv("PERSISTENT_CACHE_TTL", "0")) or None
+# Number of recent history inputs to pre-generate into the caches at startup (0 disables)
+GENERATION_CACHE_WARMUP = int(os.getenv("GENERATION_CACHE_WARMUP", "0"))
+
+# Template hot reload: seconds between checks of TEMPLATES_DIR (0 disables the watcher)
+TEMPLATE_RELOAD_INTERVAL = float(os.getenv("TEMPLATE_RELOAD_INTERVAL", "0"))
+
+# Headless HTTP API (python server.py)
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_BATCH_SIZE = int(os.getenv("SERVER_BATCH_SIZE", "64"))
+SERVER_BATCH_WAIT_MS = float(os.getenv("SERVER_BATCH_WAIT_MS", "2"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "2"))
+
 # Application settings
 APP_NAME = "Engineered Prompt"
 APP_VERSION = "0.1.0"
+# Prompts per page of the history view (more are loaded on demand)
+HISTORY_PAGE_SIZE = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
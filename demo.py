@@ -9,8 +9,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from src.prompt_generator import PromptGenerator
-from src.database import PromptDatabase
-from src.task_classifier import TaskClassifier
+from src.shared import build_database
+from src.bundle import load_bundle
 import config
 
 
@@ -28,9 +28,10 @@ def demo():
 
     # Initialize components
     print("🔧 מאתחל רכיבי מערכת...")
-    generator = PromptGenerator(config.TEMPLATES_DIR)
-    db = PromptDatabase(config.DATABASE_URL)
-    classifier = TaskClassifier()
+    generator = PromptGenerator(config.TEMPLATES_DIR, bundle=load_bundle(config.BUNDLE_PATH, config.TEMPLATES_DIR))
+    db = build_database()
+    db.save_template_revisions(generator.registry.revisions())
+    classifier = generator.classifier
 
     print(f"✓ נטענו {len(generator.get_available_templates())} טמפלטים ממוקדים")
     print("✓ מסד נתונים מוכן")
@@ -105,7 +106,9 @@ def demo():
             detected_intent=result.task_type,
             generated_prompt=result.prompt,
             detected_style=str(result.metadata.get("style", {})),
-            metadata=result.metadata
+            metadata=result.metadata,
+            template_version=result.template_version,
+            variables=result.variables
         )
         print(f"💾 נשמר במסד נתונים (ID: {prompt_id})")
 
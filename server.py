@@ -0,0 +1,227 @@
+"""
+Engineered Prompt - Headless HTTP API
+JSON endpoints for generation, feedback, history and statistics, without Streamlit
+
+Endpoints:
+    POST /generate  {"hebrew_text", "context"?, "instructions"?, "override_task"?, "save"?}
+    POST /feedback  {"prompt_id", "feedback", "rating"?}
+    GET  /history?limit=20&intent=visual&cursor=...  (cursor = next_cursor of the previous page)
+    GET  /stats
+    GET  /health
+
+Usage:
+    python server.py --port 8000 --batch-size 64 --batch-wait-ms 2
+"""
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+from urllib.parse import parse_qs, urlsplit
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.database import PromptDatabase
+from src.micro_batcher import MicroBatcher
+from src.prompt_generator import PromptGenerator
+from src.shared import get_database, get_generator, track_template_revisions
+import config
+
+
+class RequestError(Exception):
+    """Invalid client request (answered with 400)."""
+
+
+class PromptService:
+    """Endpoint implementations shared by all HTTP handler threads."""
+
+    def __init__(self, generator: PromptGenerator, db: PromptDatabase, batcher: MicroBatcher):
+        self.generator = generator
+        self.db = db
+        self.batcher = batcher
+
+    def generate(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        hebrew_text = body.get("hebrew_text")
+        if not isinstance(hebrew_text, str) or not hebrew_text.strip():
+            raise RequestError("hebrew_text is required")
+        save = body.get("save", True)
+        if not isinstance(save, bool):
+            raise RequestError("save must be true or false")
+
+        result, prompt_id = self.batcher.generate(
+            hebrew_text,
+            context=body.get("context") or "",
+            instructions=body.get("instructions") or "",
+            override_task=body.get("override_task") or None,
+            save=save
+        )
+        return {"prompt_id": prompt_id, **asdict(result)}
+
+    def feedback(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        if "prompt_id" not in body or body.get("feedback") not in ("good", "bad", "neutral"):
+            raise RequestError("prompt_id and feedback (good/bad/neutral) are required")
+
+        rating = body.get("rating")
+        updated = self.db.update_feedback(int(body["prompt_id"]), body["feedback"], float(rating) if rating is not None else None)
+        return {"updated": updated}
+
+    def history(self, query: Dict[str, str]) -> Dict[str, Any]:
+        limit = max(1, min(int(query.get("limit", 20)), 500))
+        return self.db.get_prompt_history_page(limit=limit, intent_filter=query.get("intent"), cursor=query.get("cursor"))
+
+    def stats(self, query: Dict[str, str]) -> Dict[str, Any]:
+        return {
+            "database": self.db.get_statistics(),
+            "batching": self.batcher.stats(),
+            "write_behind": self.db.write_behind_stats(),
+            "cache": self.generator.cache_stats(),
+            "persistent_cache": self.generator.persistent_cache_stats(),
+            "templates": self.generator.reload_stats()
+        }
+
+    def health(self, query: Dict[str, str]) -> Dict[str, Any]:
+        return {"status": "ok", "version": config.APP_VERSION}
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Routes JSON requests to the server's PromptService."""
+
+    protocol_version = "HTTP/1.1"
+    server: "PromptServer"
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        routes = {"/history": self.server.service.history, "/stats": self.server.service.stats, "/health": self.server.service.health}
+        handler = routes.get(url.path)
+        if handler is None:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint: {url.path}"})
+            return
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        self._dispatch(handler, query)
+
+    def do_POST(self) -> None:
+        routes = {"/generate": self.server.service.generate, "/feedback": self.server.service.feedback}
+        handler = routes.get(urlsplit(self.path).path)
+        length = int(self.headers.get("Content-Length", 0))
+        raw_body = self.rfile.read(length) if length else b""
+        if handler is None:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        try:
+            body = json.loads(raw_body or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": f"Invalid JSON body: {e}"})
+            return
+        self._dispatch(handler, body)
+
+    def _dispatch(self, handler, argument) -> None:
+        try:
+            self._send(HTTPStatus.OK, handler(argument))
+        except (RequestError, ValueError) as e:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+        except Exception as e:
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"})
+
+    def _send(self, status: HTTPStatus, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PromptServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the shared PromptService."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, service: PromptService, verbose: bool = False):
+        super().__init__(address, RequestHandler)
+        self.service = service
+        self.verbose = verbose
+
+
+def create_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    generator: Optional[PromptGenerator] = None,
+    db: Optional[PromptDatabase] = None,
+    batch_size: int = 64,
+    batch_wait: float = 0.002,
+    workers: int = 2,
+    verbose: bool = False
+) -> PromptServer:
+    """
+    Create (but do not start) the HTTP server.
+
+    Args:
+        host: Interface to bind
+        port: Port to bind (0 = any free port)
+        generator: Prompt generator (defaults to the process-wide one)
+        db: Database (defaults to the process-wide one)
+        batch_size: Maximum generate requests per micro-batch
+        batch_wait: Seconds to wait for a micro-batch to fill
+        workers: Micro-batch worker threads
+        verbose: Log every request
+
+    Returns:
+        Server; call serve_forever() to run it and server_close() plus
+        service.batcher.close() to stop it
+    """
+    if generator is not None or db is not None:
+        generator = generator if generator is not None else get_generator()
+        db = db if db is not None else get_database()
+        track_template_revisions(generator, db)
+    else:
+        # get_generator() already records the shared generator's revisions in the shared database
+        generator = get_generator()
+        db = get_database()
+    batcher = MicroBatcher(generator, db, max_batch_size=batch_size, max_wait=batch_wait, workers=workers)
+    return PromptServer((host, port), PromptService(generator, db, batcher), verbose=verbose)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Serve the prompt generator over HTTP")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--batch-size", type=int, default=config.SERVER_BATCH_SIZE)
+    parser.add_argument("--batch-wait-ms", type=float, default=config.SERVER_BATCH_WAIT_MS)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS)
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args(argv)
+
+    server = create_server(
+        args.host,
+        args.port,
+        batch_size=args.batch_size,
+        batch_wait=args.batch_wait_ms / 1000,
+        workers=args.workers,
+        verbose=args.verbose
+    )
+    print(f"Serving Engineered Prompt API on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.batcher.close()
+        server.service.db.flush()
+
+
+if __name__ == "__main__":
+    main()
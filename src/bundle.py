@@ -0,0 +1,122 @@
+"""Compiled startup bundle - precompiled lexicons, classifier tables and parsed templates."""
+import argparse
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .task_classifier import TaskClassifier
+from .template_registry import TemplateRegistry
+
+BUNDLE_FORMAT = 1
+
+# Modules whose class-level tables end up in the bundle
+SOURCE_MODULES = [
+    "keyword_index.py", "text_analysis.py", "task_classifier.py",
+    "template_renderer.py", "variable_extractor.py", "template_registry.py", "prompt_generator.py", "bundle.py"
+]
+
+
+@dataclass
+class CompiledBundle:
+    """Everything PromptGenerator and TaskClassifier compile at construction, ready to use."""
+    source_hash: str
+    registry: TemplateRegistry
+    classifier: TaskClassifier
+
+
+def source_hash(templates_dir: Path) -> str:
+    """Hash the template files and lexicon-defining sources the bundle is compiled from."""
+    digest = hashlib.sha256(f"{BUNDLE_FORMAT}:{sys.version_info[:2]}".encode())
+    source_dir = Path(__file__).parent
+
+    files = [source_dir / name for name in SOURCE_MODULES] + sorted(Path(templates_dir).glob("*.json"))
+    for path in files:
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+
+    return digest.hexdigest()
+
+
+def build_bundle(templates_dir: Path) -> CompiledBundle:
+    """Compile templates, classifier tables and the shared analyzer from source."""
+    from .prompt_generator import PromptGenerator
+
+    generator = PromptGenerator(templates_dir)
+    return CompiledBundle(
+        source_hash=source_hash(templates_dir),
+        registry=generator.registry,
+        classifier=generator.classifier
+    )
+
+
+def write_bundle(bundle: CompiledBundle, path: Path) -> None:
+    """Write a bundle atomically, so concurrent readers never see a partial file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_name, path)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def load_bundle(path: Path, templates_dir: Path, rebuild: bool = True) -> Optional[CompiledBundle]:
+    """
+    Load a compiled bundle with a single read, rebuilding it if stale.
+
+    The bundle is a pickle written by this module; only load files from
+    trusted locations.
+
+    Args:
+        path: Bundle file location
+        templates_dir: Templates directory the bundle must match
+        rebuild: Rebuild and rewrite a missing, unreadable or stale bundle
+
+    Returns:
+        Up-to-date bundle (None if it is stale and rebuild is False)
+    """
+    expected_hash = source_hash(templates_dir)
+
+    try:
+        bundle = pickle.loads(Path(path).read_bytes())
+        if isinstance(bundle, CompiledBundle) and bundle.source_hash == expected_hash:
+            return bundle
+    except (OSError, pickle.UnpicklingError, AttributeError, EOFError, ImportError):
+        pass
+
+    if not rebuild:
+        return None
+
+    bundle = build_bundle(templates_dir)
+    try:
+        write_bundle(bundle, path)
+    except OSError as e:
+        print(f"Error writing bundle {path}: {e}")
+    return bundle
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    """Build the compiled bundle ahead of deployment."""
+    import config
+
+    parser = argparse.ArgumentParser(description="Precompile templates and classifier lexicons")
+    parser.add_argument("--templates-dir", type=Path, default=config.TEMPLATES_DIR)
+    parser.add_argument("--output", type=Path, default=config.BUNDLE_PATH)
+    args = parser.parse_args(argv)
+
+    bundle = build_bundle(args.templates_dir)
+    write_bundle(bundle, args.output)
+    print(f"Wrote bundle {bundle.source_hash[:12]} with {len(bundle.registry.templates)} templates to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
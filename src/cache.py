@@ -0,0 +1,273 @@
+"""Result caching - bounded LRU caches (in memory and SQLite-backed) with optional TTL and hit/miss counters."""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe, size-bounded least-recently-used cache with optional time-to-live."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        Initialize cache.
+
+        Args:
+            maxsize: Maximum number of entries kept; the least recently used is evicted first
+            ttl: Optional lifetime of an entry in seconds (None = never expires)
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale = 0
+
+    def get(self, key: Hashable, default: Any = None, is_valid: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Get a cached value and mark it as recently used.
+
+        An entry rejected by is_valid is dropped and counted as stale and as a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            if is_valid is not None and not is_valid(value):
+                del self._entries[key]
+                self.stale += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if the cache is full."""
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0.0
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._entries[key] = (value, expires_at)
+
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Copies (e.g. in worker processes) start empty with the same limits
+        return {"maxsize": self.maxsize, "ttl": self.ttl}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(state["maxsize"], state["ttl"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "stale": self.stale,
+            }
+
+
+class PersistentCache:
+    """
+    SQLite-backed LRU cache of JSON values.
+
+    Entries survive restarts and are shared by every process that opens the
+    same file. The size limit is enforced by periodic sweeps, so the table can
+    briefly exceed maxsize by up to sweep_interval entries per process.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        maxsize: int = 100_000,
+        ttl: Optional[float] = None,
+        sweep_interval: int = 256,
+        touch_interval: float = 60.0
+    ):
+        """
+        Open (or create) a cache file.
+
+        Args:
+            path: SQLite database file
+            maxsize: Maximum number of entries kept; the least recently used are evicted first
+            ttl: Optional lifetime of an entry in seconds (None = never expires)
+            sweep_interval: Writes from this process between eviction sweeps
+            touch_interval: Minimum seconds between recency updates of one entry,
+                so cache hits rarely need a write
+        """
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+
+        self.path = Path(path)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale = 0
+        self._connection = self._connect()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.path), timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_accessed_at ON cache_entries (accessed_at)")
+        return connection
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pickled copies (e.g. in spawned worker processes) open their own connection to the same file.
+        # A forked child inherits the parent's connection instead and must not use it.
+        return {
+            "path": self.path,
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "sweep_interval": self.sweep_interval,
+            "touch_interval": self.touch_interval
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)
+
+    def get(self, key: str, default: Any = None, is_valid: Optional[Callable[[Any], bool]] = None) -> Any:
+        """
+        Get a cached value and mark it as recently used.
+
+        An entry whose decoded value is rejected by is_valid is deleted and
+        counted as stale and as a miss.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, created_at, accessed_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+
+            value, created_at, accessed_at = row
+            if self.ttl and created_at + self.ttl <= now:
+                self._connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            value = json.loads(value)
+            if is_valid is not None and not is_valid(value):
+                self._connection.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self.stale += 1
+                self.misses += 1
+                return default
+
+            if now - accessed_at >= self.touch_interval:
+                self._connection.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a JSON-serializable value."""
+        self.set_many([(key, value)])
+
+    def set_many(self, items: Iterable[Tuple[str, Any]]) -> None:
+        """Store many values in one transaction."""
+        now = time.time()
+        rows = [(key, json.dumps(value, ensure_ascii=False), now, now) for key, value in items]
+        with self._lock:
+            with self._connection:
+                self._connection.execute("BEGIN")
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO cache_entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+            self._writes_since_sweep += len(rows)
+            if self._writes_since_sweep >= self.sweep_interval:
+                self._sweep(now)
+
+    def _sweep(self, now: float) -> None:
+        """Delete expired entries and evict least recently used ones beyond maxsize (lock held)."""
+        self._writes_since_sweep = 0
+        if self.ttl:
+            cursor = self._connection.execute("DELETE FROM cache_entries WHERE created_at <= ?", (now - self.ttl,))
+            self.expirations += cursor.rowcount
+        cursor = self._connection.execute(
+            "DELETE FROM cache_entries WHERE key IN ("
+            "SELECT key FROM cache_entries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,)
+        )
+        self.evictions += cursor.rowcount
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._connection.execute("DELETE FROM cache_entries")
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters."""
+        size = len(self)
+        with self._lock:
+            return {
+                "path": str(self.path),
+                "size": size,
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "stale": self.stale,
+            }
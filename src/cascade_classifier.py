@@ -0,0 +1,94 @@
+"""Cascading task classification - cheap stages answer decisive inputs, harder ones fall through."""
+import time
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from .task_classifier import TaskClassifier, TaskResult, fingerprint_of
+from .text_analysis import TextAnalysis, TextAnalyzer
+
+
+class CascadeClassifier(TaskClassifier):
+    """
+    Runs classifier backends in order of cost and stops at the first decisive answer.
+
+    A stage is decisive when it matched something (non-empty all_scores), its
+    confidence reaches min_confidence and the margin between its best and
+    second-best score reaches min_margin. The last stage always answers.
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Tuple[str, TaskClassifier]],
+        min_confidence: float = 0.3,
+        min_margin: float = 0.2,
+        analyzer: Optional[TextAnalyzer] = None
+    ):
+        """
+        Initialize cascade.
+
+        Args:
+            stages: (name, classifier) pairs, cheapest first
+            min_confidence: Minimum confidence for an early exit
+            min_margin: Minimum gap between the two best task scores for an early exit
+            analyzer: Existing analyzer to share; its lexicons must include lexicons()
+        """
+        if not stages:
+            raise ValueError("A cascade needs at least one stage")
+
+        super().__init__(analyzer)
+        self.stages: List[Tuple[str, TaskClassifier]] = list(stages)
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+
+    def fingerprint(self) -> str:
+        """Hash of the thresholds and every stage's fingerprint (recomputed, as stages may change)."""
+        stages = [[name, classifier.fingerprint()] for name, classifier in self.stages]
+        return fingerprint_of([type(self).__name__, self.min_confidence, self.min_margin, stages])
+
+    def is_decisive(self, result: TaskResult) -> bool:
+        """Check whether a stage result is confident enough to skip later stages."""
+        scores = sorted(result.metadata.get("all_scores", {}).values(), reverse=True)
+        if not scores:
+            return False
+
+        runner_up = scores[1] if len(scores) > 1 else 0.0
+        return result.confidence >= self.min_confidence and scores[0] - runner_up >= self.min_margin
+
+    def classify_analysis(self, analysis: TextAnalysis) -> TaskResult:
+        """
+        Classify an already analyzed text through the cascade.
+
+        Args:
+            analysis: TextAnalysis whose hits include the classifier lexicons
+
+        Returns:
+            TaskResult of the answering stage; metadata gains "cascade_stage"
+            and "stage_latency_ms" (per stage that ran)
+        """
+        latencies = {}
+        last = len(self.stages) - 1
+
+        for position, (name, classifier) in enumerate(self.stages):
+            started = time.perf_counter()
+            result = classifier.classify_analysis(analysis)
+            latencies[name] = (time.perf_counter() - started) * 1000
+
+            if position == last or self.is_decisive(result):
+                result.metadata["cascade_stage"] = name
+                result.metadata["stage_latency_ms"] = latencies
+                return result
+
+    def classify_many(self, texts: Iterable[str], chunk_size: int = 4096) -> List[TaskResult]:
+        """
+        Classify many texts through the cascade.
+
+        Each text runs through the stages on its own, so every result carries
+        the same cascade metadata as classify_task.
+
+        Args:
+            texts: Hebrew input texts
+            chunk_size: Unused; kept for signature compatibility
+
+        Returns:
+            TaskResult per text, in input order
+        """
+        return [self.classify_analysis(self.analyzer.analyze(text)) for text in texts]
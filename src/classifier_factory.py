@@ -0,0 +1,52 @@
+"""Classifier backend selection - builds the task classifier named in configuration."""
+from pathlib import Path
+from typing import Optional
+
+from .task_classifier import TaskClassifier
+from .text_analysis import TextAnalyzer
+
+
+def create_classifier(
+    backend: str = "rules",
+    model_path: Optional[Path] = None,
+    min_confidence: float = 0.3,
+    min_margin: float = 0.2,
+    analyzer: Optional[TextAnalyzer] = None
+) -> TaskClassifier:
+    """
+    Create a task classifier backend.
+
+    Args:
+        backend: "rules" for the keyword classifier, "naive_bayes" for the trained
+            model, or "cascade" for rules with fallback to the trained model
+        model_path: Path of the trained model file (required for naive_bayes and cascade)
+        min_confidence: Cascade only - minimum rule confidence to answer without the model
+        min_margin: Cascade only - minimum gap between the two best rule scores
+        analyzer: Existing analyzer for the classifiers to share instead of compiling their own
+
+    Returns:
+        Classifier exposing classify_task / classify_analysis
+    """
+    if backend == "rules":
+        return TaskClassifier(analyzer)
+
+    if backend in ("naive_bayes", "cascade"):
+        from .statistical_classifier import NaiveBayesClassifier
+
+        if model_path is None or not Path(model_path).exists():
+            raise FileNotFoundError(f"Classifier model not found: {model_path}")
+        model = NaiveBayesClassifier.load(model_path, analyzer)
+
+        if backend == "naive_bayes":
+            return model
+
+        from .cascade_classifier import CascadeClassifier
+
+        return CascadeClassifier(
+            [("rules", TaskClassifier(analyzer)), ("naive_bayes", model)],
+            min_confidence=min_confidence,
+            min_margin=min_margin,
+            analyzer=analyzer
+        )
+
+    raise ValueError(f"Unknown classifier backend: {backend}")
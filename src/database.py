@@ -1,11 +1,80 @@
 """Database module for storing and indexing prompts."""
+import argparse
+import asyncio
+import atexit
+import base64
+import itertools
+import threading
+from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float
+from typing import Iterable, Iterator, List, Optional, Dict, Any, Tuple
+from sqlalchemy import (
+    bindparam, create_engine, event, func, insert, inspect, select, text, tuple_, update, Column, Index, Integer, String, Text, DateTime, Float
+)
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 import json
 
+from .cache import LRUCache
+from .template_renderer import UNSPECIFIED, CompiledTemplate
+from .write_behind import WriteBehindWriter
+
+STORAGE_MODES = ("full", "reference")
+
+# SQLite pragmas applied to every new connection. "default" leaves SQLite's
+# own settings (rollback journal, synchronous=FULL, 2MB page cache).
+# "durable" keeps synchronous=FULL (no committed write is lost on power
+# failure) but uses WAL so readers do not block the writer; "throughput"
+# syncs only at WAL checkpoints (a crash may drop the latest commits, the
+# file stays consistent) and maps the file into memory.
+SQLITE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {},
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,  # Negative = KiB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000
+    },
+    "throughput": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 268435456,
+        "cache_size": -64000,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000
+    }
+}
+SQLITE_PRAGMAS = ("journal_mode", "synchronous", "mmap_size", "cache_size", "temp_store", "busy_timeout")
+
+# variables_json key listing variables whose value is the input text itself
+# ("$" cannot occur in variable names)
+INPUT_VARIABLES_KEY = "$input"
+
+
+def _encode_variables(variables: Dict[str, str], input_text: str) -> str:
+    """Compact variables for reference storage: unspecified values are dropped, input copies referenced."""
+    stored: Dict[str, Any] = {}
+    input_variables = []
+    for name, value in variables.items():
+        if value == UNSPECIFIED:
+            continue
+        if value == input_text:
+            input_variables.append(name)
+        else:
+            stored[name] = value
+    if input_variables:
+        stored[INPUT_VARIABLES_KEY] = input_variables
+    return json.dumps(stored, ensure_ascii=False)
+
+
+def _decode_variables(variables_json: str, input_text: str) -> Dict[str, str]:
+    variables = json.loads(variables_json)
+    for name in variables.pop(INPUT_VARIABLES_KEY, ()):
+        variables[name] = input_text
+    return variables
+
 Base = declarative_base()
 
 
@@ -18,12 +87,25 @@ class PromptRecord(Base):
     input_text = Column(Text, nullable=False)  # Original Hebrew text
     detected_intent = Column(String(100), nullable=False)
     detected_style = Column(String(50))
-    generated_prompt = Column(Text, nullable=False)
+    generated_prompt = Column(Text, nullable=False)  # Empty when stored by reference (see variables_json)
     user_feedback = Column(String(20))  # good, bad, neutral
     rating = Column(Float)  # 1-5
     metadata_json = Column(Text)  # JSON string for additional data
+    template_version = Column(String(64), index=True)  # Content hash of the template revision used
+    variables_json = Column(Text)  # Reference storage: variable values to render template_version with
+    source_key = Column(String(200))  # Unique key of the input that produced the row (e.g. batch run and offset)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Access paths of the read queries: history (all, per intent) sorted by
+    # created_at, best prompts per intent by rating, training examples by rating
+    __table_args__ = (
+        Index("ix_prompts_created_at", "created_at"),
+        Index("ix_prompts_intent_created_at", "detected_intent", "created_at"),
+        Index("ix_prompts_intent_rating", "detected_intent", "rating"),
+        Index("ix_prompts_rating", "rating"),
+        Index("ux_prompts_source_key", "source_key", unique=True),
+    )
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert record to dictionary."""
         return {
@@ -35,86 +117,838 @@ class PromptRecord(Base):
             "user_feedback": self.user_feedback,
             "rating": self.rating,
             "metadata": json.loads(self.metadata_json) if self.metadata_json else {},
+            "template_version": self.template_version,
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
 
 
+class TemplateRevision(Base):
+    """Database model for every template revision seen, keyed by its content hash."""
+
+    __tablename__ = "template_revisions"
+
+    version = Column(String(64), primary_key=True)
+    task_type = Column(String(100), nullable=False, index=True)
+    name = Column(String(200))
+    content_json = Column(Text, nullable=False)  # The full template JSON
+    first_seen_at = Column(DateTime, default=datetime.utcnow)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert record to dictionary."""
+        return {
+            "version": self.version,
+            "task_type": self.task_type,
+            "name": self.name,
+            "template": json.loads(self.content_json),
+            "first_seen_at": self.first_seen_at.isoformat() if self.first_seen_at else None
+        }
+
+
+class PromptStats(Base):
+    """Running per-intent totals of the prompts table (see PromptDatabase stats_table)."""
+
+    __tablename__ = "prompt_stats"
+
+    intent = Column(String(100), primary_key=True)
+    prompt_count = Column(Integer, nullable=False, default=0)
+    rated_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Float, nullable=False, default=0.0)
+
+
+# Per-intent change of the prompt_stats columns: (prompt_count, rated_count, rating_sum)
+_StatsDelta = Dict[str, Tuple[int, int, float]]
+
+
+def _add_stats_delta(deltas: _StatsDelta, intent: str, prompts: int, old_rating: Optional[float], new_rating: Optional[float]) -> None:
+    count, rated, rating_sum = deltas.get(intent, (0, 0, 0.0))
+    deltas[intent] = (
+        count + prompts,
+        rated + (new_rating is not None) - (old_rating is not None),
+        rating_sum + (new_rating or 0.0) - (old_rating or 0.0)
+    )
+
+
+def _stats_statements(deltas: _StatsDelta):
+    """(update, insert) statement pairs applying deltas; the insert is only needed if the update matched no row."""
+    for intent, (count, rated, rating_sum) in deltas.items():
+        yield (
+            update(PromptStats)
+            .where(PromptStats.intent == intent)
+            .values(
+                prompt_count=PromptStats.prompt_count + count,
+                rated_count=PromptStats.rated_count + rated,
+                rating_sum=PromptStats.rating_sum + rating_sum
+            ),
+            insert(PromptStats).values(intent=intent, prompt_count=count, rated_count=rated, rating_sum=rating_sum)
+        )
+
+
+def _statistics(rows: Iterable[Tuple[str, int, int, float]]) -> Dict[str, Any]:
+    """Build the get_statistics result from (intent, prompt count, rated count, rating sum) rows."""
+    by_intent = {}
+    total_prompts = rated_count = 0
+    rating_sum = 0.0
+    for intent, count, rated, intent_rating_sum in sorted(rows):
+        if not count:
+            continue
+        by_intent[intent] = {
+            "prompts": count,
+            "average_rating": (intent_rating_sum or 0.0) / rated if rated else 0
+        }
+        total_prompts += count
+        rated_count += rated
+        rating_sum += intent_rating_sum or 0.0
+
+    return {
+        "total_prompts": total_prompts,
+        "average_rating": rating_sum / rated_count if rated_count else 0,
+        "total_intents": len(by_intent),
+        "intents": list(by_intent),
+        "by_intent": by_intent
+    }
+
+
+@dataclass(slots=True)
+class BulkResult:
+    """Outcome of a bulk write - one ID per input row (None where the row failed) and the failures."""
+    ids: List[Optional[int]]
+    errors: Dict[int, str]  # Input position -> error
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterable[List[Any]]:
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def _encode_cursor(record: PromptRecord) -> str:
+    """Opaque history cursor pointing after record in (created_at, id) descending order."""
+    created_at = record.created_at.isoformat() if record.created_at else None
+    return base64.urlsafe_b64encode(json.dumps([created_at, record.id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(record_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid history cursor: {cursor!r}") from e
+
+
+def sqlite_pragmas(profile: str = "default", overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Pragmas of a SQLITE_PROFILES preset with individual settings overridden.
+
+    Raises:
+        ValueError: Unknown profile or pragma, or a value that is not a plain word/number
+    """
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile: {profile} (expected one of {tuple(SQLITE_PROFILES)})")
+
+    pragmas = {**SQLITE_PROFILES[profile], **(overrides or {})}
+    for name, value in pragmas.items():
+        if name not in SQLITE_PRAGMAS:
+            raise ValueError(f"Unsupported SQLite pragma: {name} (expected one of {SQLITE_PRAGMAS})")
+        if not str(value).lstrip("-").isalnum():
+            raise ValueError(f"Invalid value for SQLite pragma {name}: {value!r}")
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine, pragmas: Dict[str, Any]) -> None:
+    """Run the pragmas on every new DBAPI connection of a SQLite engine (sync or async)."""
+    if not pragmas or engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+def migrate_schema(engine) -> List[str]:
+    """
+    Add columns and indexes that the models gained after a table was created.
+
+    create_all() only creates missing tables, so existing databases need this
+    for new columns and indexes. Columns are added as nullable, leaving old
+    rows valid. Building an index on a large table takes a while (once).
+
+    Returns:
+        "table.column" or "table.index" for everything added
+    """
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    added.append(f"{table.name}.{column.name}")
+
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(connection)
+                    added.append(f"{table.name}.{index.name}")
+    return added
+
+
 class PromptDatabase:
     """Database handler for prompt storage and retrieval."""
 
-    def __init__(self, database_url: str = "sqlite:///./prompts.db"):
-        """Initialize database connection."""
+    def __init__(
+        self,
+        database_url: str = "sqlite:///./prompts.db",
+        storage_mode: str = "full",
+        render_cache_size: int = 1024,
+        stats_table: bool = False,
+        sqlite_profile: str = "default",
+        sqlite_overrides: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Initialize database connection.
+
+        Args:
+            database_url: SQLAlchemy database URL
+            storage_mode: "full" stores rendered prompts; "reference" stores the
+                template version and variable values and renders on read
+            render_cache_size: Rendered prompts of reference rows kept in memory
+            stats_table: Keep running totals in prompt_stats, updated in the
+                transaction of every write, so get_statistics reads a few rows
+                instead of aggregating the prompts table
+            sqlite_profile: Connection pragmas preset (see SQLITE_PROFILES)
+            sqlite_overrides: Individual pragmas replacing the preset's values
+        """
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode: {storage_mode} (expected one of {STORAGE_MODES})")
+
+        self.storage_mode = storage_mode
+        self.stats_table = stats_table
+        self.sqlite_pragmas = sqlite_pragmas(sqlite_profile, sqlite_overrides)
         self.engine = create_engine(database_url, connect_args={"check_same_thread": False})
+        apply_sqlite_pragmas(self.engine, self.sqlite_pragmas)
         Base.metadata.create_all(bind=self.engine)
+        migrate_schema(self.engine)
         self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.database_url = database_url
+        self._async_engine = None
+        self._async_sessionmaker = None
+        # Reference rows are only written for revisions known to be stored (and compiled to check them)
+        self._known_template_versions = set()
+        self._renderers: Dict[str, CompiledTemplate] = {}
+        if storage_mode == "reference":
+            with self.get_session() as session:
+                for revision in session.scalars(select(TemplateRevision)):
+                    self._compile_revision(revision)
+                    self._known_template_versions.add(revision.version)
+        self._render_cache = LRUCache(render_cache_size)
+        self._writer: Optional[WriteBehindWriter] = None
+        self._id_lock = threading.Lock()
+        self._next_ids = None
+        if stats_table:
+            self._check_stats_table()
 
     def get_session(self) -> Session:
         """Get database session."""
         return self.SessionLocal()
 
+    def _new_row(
+        self,
+        input_text: str,
+        detected_intent: str,
+        generated_prompt: str,
+        detected_style: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        template_version: Optional[str] = None,
+        variables: Optional[Dict[str, str]] = None,
+        source_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Column values of a new prompts row (without id and created_at).
+
+        Raises:
+            ValueError: A required text field is missing
+        """
+        for name, value in (("input_text", input_text), ("detected_intent", detected_intent), ("generated_prompt", generated_prompt)):
+            if not isinstance(value, str):
+                raise ValueError(f"{name} must be a string, got {type(value).__name__}")
+
+        if metadata and metadata.get("original_text") == input_text:
+            # Already stored in input_text
+            metadata = {key: value for key, value in metadata.items() if key != "original_text"}
+
+        variables_json = None
+        if (
+            self.storage_mode == "reference"
+            and variables is not None
+            and template_version in self._known_template_versions
+        ):
+            # Only a prompt that re-renders exactly (e.g. not edited by the caller) is stored by reference
+            renderer = self._renderers.get(template_version)
+            if renderer is not None and renderer.render(variables) == generated_prompt:
+                variables_json = _encode_variables(variables, input_text)
+                generated_prompt = ""
+
+        return {
+            "input_text": input_text,
+            "detected_intent": detected_intent,
+            "detected_style": detected_style,
+            "generated_prompt": generated_prompt,
+            "metadata_json": json.dumps(metadata, ensure_ascii=False) if metadata else None,
+            "template_version": template_version,
+            "variables_json": variables_json,
+            "source_key": source_key
+        }
+
+    def _record_dict(self, record: PromptRecord, session: Session) -> Dict[str, Any]:
+        """record.to_dict(), with the prompt of a reference row rendered (record may also be a Core row)."""
+        data = PromptRecord.to_dict(record)
+        if record.variables_json is not None:
+            data["generated_prompt"] = self._render_reference(record, session)
+        return data
+
+    def _render_reference(self, record: PromptRecord, session: Optional[Session]) -> str:
+        """Render a reference row (session loads its template revision if not compiled yet)."""
+        key = (record.template_version, record.variables_json, record.input_text)
+        rendered = self._render_cache.get(key)
+        if rendered is None:
+            renderer = self._renderers.get(record.template_version)
+            if renderer is None:
+                renderer = self._compile_revision(session.get(TemplateRevision, record.template_version))
+            rendered = renderer.render(_decode_variables(record.variables_json, record.input_text))
+            self._render_cache.set(key, rendered)
+        return rendered
+
+    def _compile_revision(self, revision: "TemplateRevision") -> CompiledTemplate:
+        renderer = CompiledTemplate(json.loads(revision.content_json)["template"])
+        self._renderers[revision.version] = renderer
+        return renderer
+
     def save_prompt(
         self,
         input_text: str,
         detected_intent: str,
         generated_prompt: str,
         detected_style: Optional[str] = None,
-        metadata: Optional[Dict[str, Any]] = None
+        metadata: Optional[Dict[str, Any]] = None,
+        template_version: Optional[str] = None,
+        variables: Optional[Dict[str, str]] = None
     ) -> int:
-        """Save a generated prompt to the database."""
+        """
+        Save a generated prompt to the database.
+
+        In reference storage mode, a prompt whose template_version was recorded
+        with save_template_revisions is stored as its variables instead of text,
+        provided rendering the variables reproduces generated_prompt exactly.
+        With write-behind enabled the record is queued and its ID returned at once.
+        """
+        row = self._new_row(
+            input_text, detected_intent, generated_prompt, detected_style, metadata, template_version, variables
+        )
+        if self._writer is not None:
+            return self._queue_rows([row])[0]
+
         session = self.get_session()
         try:
-            record = PromptRecord(
-                input_text=input_text,
-                detected_intent=detected_intent,
-                detected_style=detected_style,
-                generated_prompt=generated_prompt,
-                metadata_json=json.dumps(metadata) if metadata else None
-            )
+            record = PromptRecord(**row)
             session.add(record)
+            self._apply_stats(session, self._rows_delta([row]))
+            session.flush()
+            record_id = record.id
             session.commit()
-            session.refresh(record)
-            return record.id
+            return record_id
         finally:
             session.close()
 
-    def update_feedback(self, prompt_id: int, feedback: str, rating: Optional[float] = None) -> bool:
-        """Update feedback for a prompt."""
+    def save_prompts(self, prompts: List[Dict[str, Any]]) -> List[int]:
+        """
+        Save many generated prompts, all in one transaction when none fails.
+
+        Convenience wrapper over save_prompts_bulk that raises instead of
+        reporting failures per row. With write-behind enabled the prompts are
+        queued like save_prompt does.
+
+        Args:
+            prompts: Dicts with the keyword arguments of save_prompt
+
+        Returns:
+            Record IDs in input order
+
+        Raises:
+            ValueError: A prompt could not be saved (the others still are)
+        """
+        if not prompts:
+            return []
+
+        if self._writer is not None:
+            return self._queue_rows([self._new_row(**prompt) for prompt in prompts])
+
+        result = self.save_prompts_bulk(prompts, chunk_size=len(prompts))
+        if not result.ok:
+            failed = ", ".join(f"{position}: {error}" for position, error in sorted(result.errors.items()))
+            raise ValueError(f"Prompts not saved - {failed}")
+        return result.ids
+
+    # Write-behind - saves are queued and committed in batches by a background thread
+
+    def start_write_behind(self, batch_size: int = 500, flush_interval: float = 0.05, max_queue: int = 10000) -> None:
+        """
+        Queue saves and commit them in batches from a background thread.
+
+        IDs are assigned in-process, counting on from the highest stored ID,
+        so this handler must be the only writer of new prompts to the database
+        while write-behind is on. Reads and feedback updates through this
+        handler flush the queue first; close() (also run at exit) flushes it.
+
+        Args:
+            batch_size: Maximum prompts per transaction
+            flush_interval: Seconds a batch may wait to fill before it is written
+            max_queue: Maximum queued prompts before saves block
+        """
+        if self._writer is not None:
+            return
+        with self.engine.connect() as connection:
+            highest_id = connection.execute(select(func.max(PromptRecord.id))).scalar() or 0
+        self._next_ids = itertools.count(highest_id + 1)
+        self._writer = WriteBehindWriter(self._write_rows, batch_size, flush_interval, max_queue)
+        atexit.register(self.close)
+
+    def flush(self) -> None:
+        """Wait until every queued save is committed (no-op without write-behind)."""
+        if self._writer is not None and self._writer.pending():
+            self._writer.flush()
+
+    def close(self) -> None:
+        """Flush and stop write-behind, then close the database connections."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            atexit.unregister(self.close)
+        self.engine.dispose()
+
+    def write_behind_stats(self) -> Optional[Dict[str, Any]]:
+        """Get write-behind queue depth and flush latency (None if disabled)."""
+        return self._writer.stats() if self._writer is not None else None
+
+    def _assign_ids(self, rows: List[Dict[str, Any]]) -> None:
+        with self._id_lock:
+            for row in rows:
+                row["id"] = next(self._next_ids)
+
+    def _queue_rows(self, rows: List[Dict[str, Any]]) -> List[int]:
+        self._assign_ids(rows)
+        created_at = datetime.utcnow()
+        for row in rows:
+            row["created_at"] = created_at
+            self._writer.put(row)
+        return [row["id"] for row in rows]
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        """Insert queued rows and their stats in one transaction (write-behind thread)."""
+        with self.engine.begin() as connection:
+            connection.execute(insert(PromptRecord), rows)
+            self._apply_stats(connection, self._rows_delta(rows))
+
+    # Bulk API - executemany Core statements in chunked transactions
+
+    def save_prompts_bulk(self, prompts: Iterable[Dict[str, Any]], chunk_size: int = 1000) -> BulkResult:
+        """
+        Insert many prompts, chunk_size rows per transaction.
+
+        A row that cannot be built or inserted fails alone: a chunk whose
+        insert fails is retried row by row, so only the bad rows are lost.
+        A prompt whose source_key is already stored is not inserted again;
+        the existing row's ID is returned for it, so re-saving is idempotent.
+
+        Args:
+            prompts: Dicts with the keyword arguments of save_prompt and an
+                optional source_key (may be a generator)
+            chunk_size: Rows per transaction
+
+        Returns:
+            BulkResult with record IDs in input order
+        """
+        self.flush()
+        ids: List[Optional[int]] = []
+        errors: Dict[int, str] = {}
+        for chunk in _chunks(prompts, chunk_size):
+            start = len(ids)
+            ids.extend([None] * len(chunk))
+            positions = []
+            rows = []
+            for position, prompt in enumerate(chunk, start):
+                try:
+                    rows.append(self._new_row(**prompt))
+                    positions.append(position)
+                except (TypeError, ValueError) as e:
+                    errors[position] = f"{type(e).__name__}: {e}"
+            existing = self._existing_source_keys(row["source_key"] for row in rows)
+            if existing:
+                kept = []
+                for position, row in zip(positions, rows):
+                    if row["source_key"] in existing:
+                        ids[position] = existing[row["source_key"]]
+                    else:
+                        kept.append((position, row))
+                positions = [position for position, _ in kept]
+                rows = [row for _, row in kept]
+            if not rows:
+                continue
+
+            try:
+                for position, record_id in zip(positions, self._insert_rows(rows)):
+                    ids[position] = record_id
+            except SQLAlchemyError:
+                for position, row in zip(positions, rows):
+                    try:
+                        ids[position] = self._insert_rows([row])[0]
+                    except SQLAlchemyError as e:
+                        errors[position] = f"{type(e).__name__}: {getattr(e, 'orig', None) or e}"
+        return BulkResult(ids, errors)
+
+    def _existing_source_keys(self, source_keys: Iterable[Optional[str]]) -> Dict[str, int]:
+        """IDs of the stored prompts with any of the given source keys."""
+        keys = [key for key in source_keys if key is not None]
+        if not keys:
+            return {}
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(PromptRecord.source_key, PromptRecord.id).where(PromptRecord.source_key.in_(keys))
+            )
+            return {key: record_id for key, record_id in rows}
+
+    def _insert_rows(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """Insert rows (and their stats) in one transaction, returning their IDs in order."""
+        created_at = datetime.utcnow()
+        for row in rows:
+            row["created_at"] = created_at
+        with self.engine.begin() as connection:
+            if self._writer is not None:
+                # IDs come from the write-behind counter so they cannot collide with queued saves
+                self._assign_ids(rows)
+                connection.execute(insert(PromptRecord), rows)
+                ids = [row["id"] for row in rows]
+            else:
+                ids = list(connection.scalars(
+                    insert(PromptRecord).returning(PromptRecord.id, sort_by_parameter_order=True),
+                    rows
+                ))
+            self._apply_stats(connection, self._rows_delta(rows))
+        return ids
+
+    def update_feedback_bulk(self, updates: Iterable[Dict[str, Any]], chunk_size: int = 1000) -> BulkResult:
+        """
+        Set feedback (and rating, where given) on many prompts, chunk_size per transaction.
+
+        Args:
+            updates: Dicts with prompt_id, feedback and optional rating (may be a generator)
+            chunk_size: Updates per transaction
+
+        Returns:
+            BulkResult with the prompt ID of every applied update; unknown
+            prompts and malformed updates are reported in errors
+        """
+        self.flush()
+        table = PromptRecord.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                user_feedback=bindparam("b_feedback"),
+                rating=func.coalesce(bindparam("b_rating", type_=Float), table.c.rating)
+            )
+        )
+
+        ids: List[Optional[int]] = []
+        errors: Dict[int, str] = {}
+        for chunk in _chunks(updates, chunk_size):
+            start = len(ids)
+            ids.extend([None] * len(chunk))
+            parsed = []
+            for position, item in enumerate(chunk, start):
+                try:
+                    rating = item.get("rating")
+                    parsed.append((position, int(item["prompt_id"]), str(item["feedback"]), float(rating) if rating is not None else None))
+                except (AttributeError, KeyError, TypeError, ValueError) as e:
+                    errors[position] = f"{type(e).__name__}: {e}"
+
+            with self.engine.begin() as connection:
+                current = {
+                    row.id: (row.detected_intent, row.rating)
+                    for row in connection.execute(
+                        select(table.c.id, table.c.detected_intent, table.c.rating)
+                        .where(table.c.id.in_({prompt_id for _, prompt_id, _, _ in parsed}))
+                    )
+                }
+                parameters = []
+                deltas: _StatsDelta = {}
+                for position, prompt_id, feedback, rating in parsed:
+                    if prompt_id not in current:
+                        errors[position] = f"Prompt not found: {prompt_id}"
+                        continue
+                    if rating is not None:
+                        intent, old_rating = current[prompt_id]
+                        if self.stats_table:
+                            _add_stats_delta(deltas, intent, 0, old_rating, rating)
+                        current[prompt_id] = (intent, rating)
+                    parameters.append({"b_id": prompt_id, "b_feedback": feedback, "b_rating": rating})
+                    ids[position] = prompt_id
+                if parameters:
+                    connection.execute(statement, parameters)
+                self._apply_stats(connection, deltas)
+        return BulkResult(ids, errors)
+
+    def save_template_revisions(self, revisions: Dict[str, Dict]) -> int:
+        """
+        Record template revisions not stored yet.
+
+        Args:
+            revisions: Template data keyed by version (see TemplateRegistry.revisions)
+
+        Returns:
+            Number of new revisions stored
+        """
+        new = {version: data for version, data in revisions.items() if version not in self._known_template_versions}
+        if not new:
+            return 0
+
         session = self.get_session()
         try:
-            record = session.query(PromptRecord).filter(PromptRecord.id == prompt_id).first()
-            if record:
-                record.user_feedback = feedback
-                if rating is not None:
-                    record.rating = rating
+            stored = set(
+                session.scalars(select(TemplateRevision.version).where(TemplateRevision.version.in_(list(new))))
+            )
+            session.add_all([
+                TemplateRevision(
+                    version=version,
+                    task_type=data.get("task_type", ""),
+                    name=data.get("name"),
+                    content_json=json.dumps(data, ensure_ascii=False, sort_keys=True)
+                )
+                for version, data in new.items()
+                if version not in stored
+            ])
+            session.commit()
+            for version, data in new.items():
+                self._renderers.setdefault(version, CompiledTemplate(data["template"]))
+            self._known_template_versions.update(new)
+            return len(new) - len(stored)
+        finally:
+            session.close()
+
+    def get_template_revision(self, version: str) -> Optional[Dict[str, Any]]:
+        """Get a stored template revision by version."""
+        session = self.get_session()
+        try:
+            record = session.get(TemplateRevision, version)
+            return record.to_dict() if record else None
+        finally:
+            session.close()
+
+    def get_template_revisions(self, task_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get stored template revisions, oldest first."""
+        session = self.get_session()
+        try:
+            query = session.query(TemplateRevision)
+            if task_type:
+                query = query.filter(TemplateRevision.task_type == task_type)
+            return [record.to_dict() for record in query.order_by(TemplateRevision.first_seen_at).all()]
+        finally:
+            session.close()
+
+    def migrate_to_reference_storage(self, batch_size: int = 500, vacuum: bool = False) -> Dict[str, int]:
+        """
+        Convert rows with a rendered prompt to reference storage.
+
+        Each row is matched against its recorded template revision, or else
+        against every stored revision of its task type. Slot values are
+        recovered from the text between literal template segments. A row is
+        converted only if re-rendering the recovered variables reproduces it
+        exactly; other rows are left unchanged.
+
+        Args:
+            batch_size: Rows converted per transaction
+            vacuum: Run VACUUM afterwards so SQLite returns the freed space
+
+        Returns:
+            Counts of converted and skipped rows
+        """
+        self.flush()
+        session = self.get_session()
+        try:
+            revisions = session.query(TemplateRevision).order_by(TemplateRevision.first_seen_at.desc()).all()
+            by_task: Dict[str, List[Tuple[str, CompiledTemplate]]] = {}
+            for revision in revisions:
+                renderer = self._renderers.get(revision.version) or self._compile_revision(revision)
+                by_task.setdefault(revision.task_type, []).append((revision.version, renderer))
+            renderers = dict(version_renderer for candidates in by_task.values() for version_renderer in candidates)
+
+            converted = skipped = 0
+            last_id = 0
+            while True:
+                records = (
+                    session.query(PromptRecord)
+                    .filter(PromptRecord.id > last_id, PromptRecord.variables_json.is_(None))
+                    .order_by(PromptRecord.id)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not records:
+                    break
+
+                for record in records:
+                    if record.template_version in renderers:
+                        candidates = [(record.template_version, renderers[record.template_version])]
+                    else:
+                        candidates = by_task.get(record.detected_intent, [])
+
+                    for version, renderer in candidates:
+                        variables = renderer.match(record.generated_prompt)
+                        if variables is not None:
+                            record.template_version = version
+                            record.variables_json = _encode_variables(variables, record.input_text)
+                            record.generated_prompt = ""
+                            converted += 1
+                            break
+                    else:
+                        skipped += 1
+
+                last_id = records[-1].id
                 session.commit()
-                return True
-            return False
         finally:
             session.close()
 
+        if vacuum and self.engine.dialect.name == "sqlite":
+            with self.engine.connect() as connection:
+                connection.exec_driver_sql("VACUUM")
+
+        return {"converted": converted, "skipped": skipped}
+
+    def update_feedback(self, prompt_id: int, feedback: str, rating: Optional[float] = None) -> bool:
+        """Update feedback for a prompt (False if it does not exist)."""
+        result = self.update_feedback_bulk([{"prompt_id": prompt_id, "feedback": feedback, "rating": rating}])
+        return result.ids[0] is not None
+
     def get_prompt_history(self, limit: int = 50, intent_filter: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Retrieve prompt history."""
+        """Retrieve prompt history (the newest limit prompts; see get_prompt_history_page for more)."""
+        return self.get_prompt_history_page(limit, intent_filter)["prompts"]
+
+    def get_prompt_history_page(
+        self,
+        limit: int = 50,
+        intent_filter: Optional[str] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Retrieve one page of prompt history, newest first.
+
+        Pages are keyed on (created_at, id) rather than an offset, so every
+        page is an index range scan costing the same as the first.
+
+        Args:
+            limit: Prompts per page
+            intent_filter: Only prompts of this intent
+            cursor: next_cursor of the previous page (None = first page)
+
+        Returns:
+            {"prompts": [...], "next_cursor": cursor of the next page, or None after the last}
+
+        Raises:
+            ValueError: Malformed cursor
+        """
+        after = _decode_cursor(cursor) if cursor else None
+        if limit <= 0:
+            return {"prompts": [], "next_cursor": None}
+        self.flush()
+        session = self.get_session()
+        try:
+            records = []
+            if after is None or after[0] is not None:
+                query = self._history_query(intent_filter).where(PromptRecord.created_at.isnot(None))
+                if after is not None:
+                    query = query.where(tuple_(PromptRecord.created_at, PromptRecord.id) < after)
+                records = list(session.scalars(query.limit(limit + 1)))
+            if len(records) <= limit:
+                # Rows without created_at (written outside this class) sort last
+                query = self._history_query(intent_filter).where(PromptRecord.created_at.is_(None))
+                if after is not None and after[0] is None:
+                    query = query.where(PromptRecord.id < after[1])
+                records += session.scalars(query.limit(limit + 1 - len(records)))
+
+            page = records[:limit]
+            return {
+                "prompts": [self._record_dict(record, session) for record in page],
+                "next_cursor": _encode_cursor(page[-1]) if len(records) > limit else None
+            }
+        finally:
+            session.close()
+
+    def iter_prompt_history(self, intent_filter: Optional[str] = None, chunk_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the whole prompt history, newest first, for exports and analytics.
+
+        Rows are fetched chunk_size at a time (yield_per) as plain Core rows,
+        skipping ORM instances, so memory stays bounded whatever the table
+        size. The read stays open until the generator is exhausted or closed.
+        """
+        self.flush()
+        session = self.get_session()
+        try:
+            query = (
+                self._history_query(intent_filter)
+                .with_only_columns(*PromptRecord.__table__.columns)
+                .execution_options(yield_per=chunk_size)
+            )
+            for row in session.execute(query):
+                yield self._record_dict(row, session)
+        finally:
+            session.close()
+
+    @staticmethod
+    def _history_query(intent_filter: Optional[str] = None):
+        query = select(PromptRecord)
+        if intent_filter:
+            query = query.where(PromptRecord.detected_intent == intent_filter)
+        return query.order_by(PromptRecord.created_at.desc(), PromptRecord.id.desc())
+
+    def get_recent_inputs(self, limit: int = 1000) -> List[str]:
+        """Get the most recently used distinct input texts (newest first)."""
+        self.flush()
         session = self.get_session()
         try:
-            query = session.query(PromptRecord)
-            if intent_filter:
-                query = query.filter(PromptRecord.detected_intent == intent_filter)
-            records = query.order_by(PromptRecord.created_at.desc()).limit(limit).all()
-            return [record.to_dict() for record in records]
+            rows = (
+                session.query(PromptRecord.input_text)
+                .group_by(PromptRecord.input_text)
+                .order_by(func.max(PromptRecord.created_at).desc())
+                .limit(limit)
+                .all()
+            )
+            return [row.input_text for row in rows]
         finally:
             session.close()
 
     def get_prompt_by_id(self, prompt_id: int) -> Optional[Dict[str, Any]]:
         """Get a specific prompt by ID."""
+        self.flush()
         session = self.get_session()
         try:
             record = session.query(PromptRecord).filter(PromptRecord.id == prompt_id).first()
-            return record.to_dict() if record else None
+            return self._record_dict(record, session) if record else None
         finally:
             session.close()
 
     def get_best_prompts(self, intent: str, min_rating: float = 4.0, limit: int = 10) -> List[Dict[str, Any]]:
         """Get best-rated prompts for a specific intent (for hindsight learning)."""
+        self.flush()
         session = self.get_session()
         try:
             records = (
@@ -127,28 +961,236 @@ class PromptDatabase:
                 .limit(limit)
                 .all()
             )
-            return [record.to_dict() for record in records]
+            return [self._record_dict(record, session) for record in records]
         finally:
             session.close()
 
-    def get_statistics(self) -> Dict[str, Any]:
-        """Get database statistics."""
+    def get_training_examples(self, min_rating: float = 4.0) -> List[Tuple[str, str]]:
+        """Get (input_text, detected_intent) pairs of well-rated prompts for classifier training."""
+        self.flush()
         session = self.get_session()
         try:
-            total_prompts = session.query(PromptRecord).count()
-            avg_rating = session.query(PromptRecord).filter(
-                PromptRecord.rating.isnot(None)
-            ).with_entities(PromptRecord.rating).all()
+            rows = (
+                session.query(PromptRecord.input_text, PromptRecord.detected_intent)
+                .filter(PromptRecord.rating >= min_rating)
+                .all()
+            )
+            return [(row.input_text, row.detected_intent) for row in rows]
+        finally:
+            session.close()
 
-            intents = session.query(
-                PromptRecord.detected_intent
-            ).distinct().all()
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Get database statistics.
 
-            return {
-                "total_prompts": total_prompts,
-                "average_rating": sum(r[0] for r in avg_rating) / len(avg_rating) if avg_rating else 0,
-                "total_intents": len(intents),
-                "intents": [i[0] for i in intents]
-            }
+        Read from prompt_stats when stats_table is enabled, otherwise
+        aggregated by one grouped query over the prompts table.
+        """
+        self.flush()
+        session = self.get_session()
+        try:
+            if self.stats_table:
+                query = select(PromptStats.intent, PromptStats.prompt_count, PromptStats.rated_count, PromptStats.rating_sum)
+            else:
+                query = self._aggregate_stats_query()
+            return _statistics(session.execute(query).all())
         finally:
             session.close()
+
+    def rebuild_statistics(self) -> None:
+        """Recompute prompt_stats from the prompts table (after writes by handlers without stats_table)."""
+        self.flush()
+        with self.engine.begin() as connection:
+            connection.execute(PromptStats.__table__.delete())
+            rows = connection.execute(self._aggregate_stats_query()).all()
+            if rows:
+                connection.execute(insert(PromptStats), [
+                    {"intent": intent, "prompt_count": count, "rated_count": rated, "rating_sum": rating_sum or 0.0}
+                    for intent, count, rated, rating_sum in rows
+                ])
+
+    @staticmethod
+    def _aggregate_stats_query():
+        return select(
+            PromptRecord.detected_intent,
+            func.count(),
+            func.count(PromptRecord.rating),
+            func.sum(PromptRecord.rating)
+        ).group_by(PromptRecord.detected_intent)
+
+    def _check_stats_table(self) -> None:
+        """Rebuild prompt_stats if its totals do not cover every stored prompt."""
+        with self.engine.connect() as connection:
+            counted = connection.execute(select(func.coalesce(func.sum(PromptStats.prompt_count), 0))).scalar()
+            stored = connection.execute(select(func.count()).select_from(PromptRecord)).scalar()
+        if counted != stored:
+            self.rebuild_statistics()
+
+    def _rows_delta(self, rows: Iterable[Dict[str, Any]]) -> _StatsDelta:
+        deltas: _StatsDelta = {}
+        if self.stats_table:
+            for row in rows:
+                _add_stats_delta(deltas, row["detected_intent"], 1, None, row.get("rating"))
+        return deltas
+
+    def _rating_delta(self, record: PromptRecord, rating: float) -> _StatsDelta:
+        deltas: _StatsDelta = {}
+        if self.stats_table:
+            _add_stats_delta(deltas, record.detected_intent, 0, record.rating, rating)
+        return deltas
+
+    @staticmethod
+    def _apply_stats(session, deltas: _StatsDelta) -> None:
+        for update_stats, insert_stats in _stats_statements(deltas):
+            if session.execute(update_stats).rowcount == 0:
+                session.execute(insert_stats)
+
+    # Async API - same operations through an async driver (aiosqlite for SQLite)
+
+    def get_async_session(self):
+        """
+        Get an async database session, creating the async engine on first use.
+
+        The engine's pooled connections belong to the event loop that opened
+        them; call aclose() before using the database from another loop.
+        """
+        if self._async_sessionmaker is None:
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+            self._async_engine = create_async_engine(async_database_url(self.database_url))
+            apply_sqlite_pragmas(self._async_engine.sync_engine, self.sqlite_pragmas)
+            self._async_sessionmaker = async_sessionmaker(self._async_engine, autoflush=False, expire_on_commit=False)
+        return self._async_sessionmaker()
+
+    async def aclose(self) -> None:
+        """Dispose the async engine and its connections."""
+        if self._async_engine is not None:
+            await self._async_engine.dispose()
+            self._async_engine = None
+            self._async_sessionmaker = None
+
+    async def asave_prompt(
+        self,
+        input_text: str,
+        detected_intent: str,
+        generated_prompt: str,
+        detected_style: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        template_version: Optional[str] = None,
+        variables: Optional[Dict[str, str]] = None
+    ) -> int:
+        """Save a generated prompt to the database (async)."""
+        row = self._new_row(
+            input_text, detected_intent, generated_prompt, detected_style, metadata, template_version, variables
+        )
+        if self._writer is not None:
+            # put() blocks while the write-behind queue is full; keep that off the event loop
+            return (await asyncio.to_thread(self._queue_rows, [row]))[0]
+
+        async with self.get_async_session() as session:
+            record = PromptRecord(**row)
+            session.add(record)
+            await self._aapply_stats(session, self._rows_delta([row]))
+            await session.commit()
+            return record.id
+
+    async def aupdate_feedback(self, prompt_id: int, feedback: str, rating: Optional[float] = None) -> bool:
+        """Update feedback for a prompt (async)."""
+        if self._writer is not None:
+            await asyncio.to_thread(self.flush)
+        async with self.get_async_session() as session:
+            record = await session.get(PromptRecord, prompt_id)
+            if record:
+                record.user_feedback = feedback
+                if rating is not None:
+                    await self._aapply_stats(session, self._rating_delta(record, rating))
+                    record.rating = rating
+                await session.commit()
+                return True
+            return False
+
+    async def aget_prompt_history(self, limit: int = 50, intent_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Retrieve prompt history (async)."""
+        if self._writer is not None:
+            await asyncio.to_thread(self.flush)
+        async with self.get_async_session() as session:
+            records = (await session.scalars(self._history_query(intent_filter).limit(limit))).all()
+            await self._aload_renderers(session, records)
+            return [self._record_dict(record, None) for record in records]
+
+    async def aget_prompt_by_id(self, prompt_id: int) -> Optional[Dict[str, Any]]:
+        """Get a specific prompt by ID (async)."""
+        if self._writer is not None:
+            await asyncio.to_thread(self.flush)
+        async with self.get_async_session() as session:
+            record = await session.get(PromptRecord, prompt_id)
+            if record is None:
+                return None
+            await self._aload_renderers(session, [record])
+            return self._record_dict(record, None)
+
+    @staticmethod
+    async def _aapply_stats(session, deltas: _StatsDelta) -> None:
+        for update_stats, insert_stats in _stats_statements(deltas):
+            if (await session.execute(update_stats)).rowcount == 0:
+                await session.execute(insert_stats)
+
+    async def _aload_renderers(self, session, records: List[PromptRecord]) -> None:
+        """Compile the template revisions reference rows need, so rendering does no I/O."""
+        missing = {
+            record.template_version
+            for record in records
+            if record.variables_json is not None and record.template_version not in self._renderers
+        }
+        if missing:
+            for revision in await session.scalars(select(TemplateRevision).where(TemplateRevision.version.in_(missing))):
+                self._compile_revision(revision)
+
+
+def async_database_url(database_url: str) -> str:
+    """Map a sync database URL to its async driver (sqlite -> sqlite+aiosqlite)."""
+    if database_url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + database_url[len("sqlite://"):]
+    return database_url
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    """Database maintenance commands."""
+    import config
+
+    parser = argparse.ArgumentParser(description="Prompt database maintenance")
+    parser.add_argument(
+        "command",
+        choices=["migrate-reference", "import-prompts", "import-feedback"],
+        help="migrate-reference: convert rendered rows to reference storage; "
+             "import-prompts / import-feedback: bulk load a JSONL file of save_prompt / update_feedback arguments"
+    )
+    parser.add_argument("path", nargs="?", help="JSONL file to import")
+    parser.add_argument("--database-url", default=config.DATABASE_URL)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--vacuum", action="store_true", help="Reclaim freed space afterwards (SQLite)")
+    args = parser.parse_args(argv)
+
+    db = PromptDatabase(
+        args.database_url,
+        config.PROMPT_STORAGE_MODE,
+        stats_table=config.PROMPT_STATS_TABLE,
+        sqlite_profile=config.SQLITE_PROFILE,
+        sqlite_overrides=config.SQLITE_OVERRIDES
+    )
+    if args.command == "migrate-reference":
+        counts = db.migrate_to_reference_storage(batch_size=args.batch_size, vacuum=args.vacuum)
+        print(f"Converted {counts['converted']} rows, left {counts['skipped']} rows unchanged")
+        return
+
+    if not args.path:
+        parser.error(f"{args.command} needs a JSONL file")
+    bulk = db.save_prompts_bulk if args.command == "import-prompts" else db.update_feedback_bulk
+    with open(args.path, encoding="utf-8") as stream:
+        result = bulk((json.loads(line) for line in stream if line.strip()), chunk_size=args.batch_size)
+    print(f"Imported {len(result.ids) - len(result.errors)} rows, {len(result.errors)} failed")
+    for position, error in list(result.errors.items())[:20]:
+        print(f"  row {position + 1}: {error}")
+
+if __name__ == "__main__":
+    main()
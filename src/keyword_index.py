@@ -0,0 +1,150 @@
+"""Multi-pattern keyword matching - Aho-Corasick automaton over named lexicons."""
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple
+
+
+# lexicon name -> label -> keywords, e.g. {"task": {"visual": ["תמונה", ...]}}
+Lexicons = Dict[str, Dict[str, List[str]]]
+
+# lexicon name -> label -> matched keywords (in declared order); only labels with hits
+LexiconHits = Dict[str, Dict[str, List[str]]]
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton that finds every pattern occurring in a text in one pass."""
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        Build the automaton.
+
+        Args:
+            patterns: Patterns to search for; pattern ids are their positions in this sequence
+        """
+        self.patterns = list(patterns)
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[int]] = [[]]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(pattern_id)
+
+        # Breadth-first pass resolving failure links into complete transition tables:
+        # delta[state] inherits its failure state's transitions, so scanning never
+        # has to walk failure links. Characters absent from delta lead back to the root.
+        fail = [0] * len(goto)
+        delta: List[Dict[str, int]] = [{} for _ in goto]
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            outputs[state].extend(outputs[fail[state]])
+            for char, next_state in goto[state].items():
+                fail[next_state] = delta[fail[state]].get(char, 0)
+                queue.append(next_state)
+
+        self._delta = delta
+        self._output: List[Tuple[int, ...]] = [tuple(ids) for ids in outputs]
+
+    def __getstate__(self) -> Dict:
+        """Pickle transition tables without the entries every state copies from the root."""
+        root = self._delta[0]
+        sparse = [{char: target for char, target in row.items() if root.get(char) != target} for row in self._delta]
+        sparse[0] = root
+        return {"patterns": self.patterns, "sparse_delta": sparse, "output": self._output}
+
+    def __setstate__(self, state: Dict) -> None:
+        """Restore complete transition tables from the pickled sparse form."""
+        root = state["sparse_delta"][0]
+        self.patterns = state["patterns"]
+        self._delta = [root] + [{**root, **row} for row in state["sparse_delta"][1:]]
+        self._output = state["output"]
+
+    def find(self, text: str) -> Set[int]:
+        """Return the ids of all patterns that occur in text."""
+        delta = self._delta
+        output = self._output
+        found: Set[int] = set()
+        state = 0
+
+        for char in text:
+            state = delta[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+
+        return found
+
+
+class LexiconIndex:
+    """Compiles several named lexicons into one automaton and scans them together."""
+
+    def __init__(self, lexicons: Lexicons):
+        """
+        Compile lexicons.
+
+        Args:
+            lexicons: Mapping of lexicon name -> label -> keywords. Keywords are
+                matched case-insensitively against lower-cased text.
+        """
+        self.lexicons = lexicons
+
+        # Each distinct keyword becomes one automaton pattern; its postings record
+        # every (lexicon, label, declared position, original keyword) it belongs to.
+        pattern_ids: Dict[str, int] = {}
+        self._postings: List[List[Tuple[str, str, int, str]]] = []
+
+        for lexicon, labels in lexicons.items():
+            for label, keywords in labels.items():
+                for position, keyword in enumerate(keywords):
+                    pattern = keyword.lower()
+                    if pattern not in pattern_ids:
+                        pattern_ids[pattern] = len(self._postings)
+                        self._postings.append([])
+                    self._postings[pattern_ids[pattern]].append((lexicon, label, position, keyword))
+
+        self._automaton = KeywordAutomaton(pattern_ids)
+        self._pattern_ids = pattern_ids
+
+    @property
+    def pattern_count(self) -> int:
+        """Number of distinct (lower-cased) keywords compiled into the automaton."""
+        return len(self._postings)
+
+    def keyword_ids(self, lexicon: str, label: str) -> List[int]:
+        """Get the pattern id of every keyword of a label, in declared order."""
+        return [self._pattern_ids[keyword.lower()] for keyword in self.lexicons[lexicon][label]]
+
+    def find_ids(self, text_lower: str) -> Set[int]:
+        """Return the ids of all distinct keywords occurring in lower-cased text."""
+        return self._automaton.find(text_lower)
+
+    def scan(self, text_lower: str) -> LexiconHits:
+        """
+        Scan lower-cased text once against every lexicon.
+
+        Returns:
+            Matched keywords per lexicon and label; labels and keywords follow declared order
+        """
+        positioned: Dict[str, Dict[str, List[Tuple[int, str]]]] = {}
+        for pattern_id in self.find_ids(text_lower):
+            for lexicon, label, position, keyword in self._postings[pattern_id]:
+                positioned.setdefault(lexicon, {}).setdefault(label, []).append((position, keyword))
+
+        # Report labels in declared order so callers can apply first-match-wins rules
+        return {
+            lexicon: {
+                label: [keyword for _, keyword in sorted(labels[label])]
+                for label in self.lexicons[lexicon] if label in labels
+            }
+            for lexicon, labels in positioned.items()
+        }
@@ -0,0 +1,171 @@
+"""Micro-batching - groups concurrent generate requests and their database writes."""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+from .database import PromptDatabase
+from .prompt_generator import GeneratedPrompt, PromptGenerator
+
+# Queued request: (generate kwargs, save to database, future for the caller)
+_Request = Tuple[Dict[str, Any], bool, Future]
+
+
+class MicroBatcher:
+    """
+    Collects generate requests from many threads into small batches.
+
+    Each worker thread takes up to max_batch_size queued requests (waiting at
+    most max_wait seconds for a batch to fill), generates them, and saves all
+    prompts of the batch in one transaction, so concurrent callers share
+    commits instead of paying one each.
+    """
+
+    def __init__(
+        self,
+        generator: PromptGenerator,
+        db: Optional[PromptDatabase] = None,
+        max_batch_size: int = 64,
+        max_wait: float = 0.002,
+        workers: int = 2
+    ):
+        """
+        Initialize and start the batch workers.
+
+        Args:
+            generator: Prompt generator
+            db: Database for saving prompts (None = never save)
+            max_batch_size: Maximum requests processed together
+            max_wait: Seconds a worker waits for more requests after the first
+            workers: Number of batch worker threads
+        """
+        self.generator = generator
+        self.db = db
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self.batch_count = 0
+        self.request_count = 0
+        self.max_batch_seen = 0
+        self._workers = [
+            threading.Thread(target=self._run, name=f"micro-batcher-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(
+        self,
+        hebrew_text: str,
+        context: str = "",
+        instructions: str = "",
+        override_task: Optional[str] = None,
+        save: bool = True
+    ) -> "Future[Tuple[GeneratedPrompt, Optional[int]]]":
+        """
+        Queue a generate request.
+
+        Returns:
+            Future resolving to (generated prompt, saved record ID or None)
+        """
+        future: Future = Future()
+        kwargs = {
+            "hebrew_text": hebrew_text,
+            "context": context,
+            "instructions": instructions,
+            "override_task": override_task
+        }
+        self._queue.put((kwargs, save and self.db is not None, future))
+        return future
+
+    def generate(self, hebrew_text: str, **kwargs) -> Tuple[GeneratedPrompt, Optional[int]]:
+        """Submit a request and wait for its result."""
+        return self.submit(hebrew_text, **kwargs).result()
+
+    def close(self) -> None:
+        """Finish queued requests and stop the workers."""
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get batching counters."""
+        with self._stats_lock:
+            return {
+                "batches": self.batch_count,
+                "requests": self.request_count,
+                "average_batch_size": self.request_count / self.batch_count if self.batch_count else 0.0,
+                "max_batch_size_seen": self.max_batch_seen,
+                "queue_depth": self._queue.qsize()
+            }
+
+    def _next_batch(self) -> Optional[List[_Request]]:
+        """Block for one request, then gather more until the batch is full or max_wait passes."""
+        first = self._queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Leave the stop marker for this worker's next round
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._process(batch)
+
+    def _process(self, batch: List[_Request]) -> None:
+        generated = []
+        for kwargs, save, future in batch:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                generated.append((self.generator.generate(**kwargs), save, future))
+            except Exception as e:
+                future.set_exception(e)
+
+        to_save = [(prompt, future) for prompt, save, future in generated if save]
+        prompt_ids: Dict[int, int] = {}
+        if to_save:
+            try:
+                ids = self.db.save_prompts([
+                    {
+                        "input_text": prompt.input_text,
+                        "detected_intent": prompt.task_type,
+                        "generated_prompt": prompt.prompt,
+                        "detected_style": str(prompt.metadata.get("style", {})),
+                        "metadata": prompt.metadata,
+                        "template_version": prompt.template_version,
+                        "variables": prompt.variables
+                    }
+                    for prompt, _ in to_save
+                ])
+                prompt_ids = {id(future): prompt_id for (_, future), prompt_id in zip(to_save, ids)}
+            except Exception as e:
+                for _, future in to_save:
+                    future.set_exception(e)
+
+        for prompt, save, future in generated:
+            if not future.done():
+                future.set_result((prompt, prompt_ids.get(id(future))))
+
+        with self._stats_lock:
+            self.batch_count += 1
+            self.request_count += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
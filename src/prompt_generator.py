@@ -1,58 +1,308 @@
 """Prompt generation engine - creates optimized prompts from focused templates."""
+import asyncio
+import dataclasses
+import hashlib
 import json
+import math
+import multiprocessing
+import threading
+import time
+import unicodedata
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Union
 from dataclasses import dataclass
 
-from .task_classifier import TaskClassifier, TaskResult
+from .bundle import CompiledBundle
+from .cache import LRUCache, PersistentCache
+from .task_classifier import TaskClassifier
+from .template_registry import TemplateRegistry, directory_signature
 
 
-@dataclass
+@dataclass(slots=True)
 class GeneratedPrompt:
-    """Result of prompt generation."""
+    """
+    Result of prompt generation.
+
+    input_text is the caller's string itself (not a copy); metadata does not
+    repeat it.
+    """
     prompt: str
     template_used: str
     task_type: str
     confidence: float
     variables: Dict[str, str]
     metadata: Dict
+    input_text: str = ""
+    template_version: str = ""
+
+
+@dataclass(slots=True)
+class BatchResult:
+    """Outcome of one generate_batch item - a prompt, or the error that prevented it."""
+    prompt: Optional[GeneratedPrompt] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# Version of the GeneratedPrompt layout stored in the persistent cache
+PERSISTENT_FORMAT = 3
+
+# A batch item: the Hebrew text alone, or a mapping with hebrew_text and
+# optional context, instructions and override_task
+BatchItem = Union[str, Mapping[str, Any]]
+
+# Generator installed in each worker process by _init_worker
+_worker_generator: Optional["PromptGenerator"] = None
+
+
+def _init_worker(generator: "PromptGenerator") -> None:
+    """Process pool initializer - receives the compiled generator once per worker."""
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _generate_chunk_in_worker(items: List[BatchItem]) -> List[BatchResult]:
+    return _worker_generator._generate_chunk(items)
 
 
 class PromptGenerator:
     """Main prompt generation engine with focused templates."""
 
-    def __init__(self, templates_dir: Optional[Path] = None):
+    def __init__(
+        self,
+        templates_dir: Optional[Path] = None,
+        cache_size: Optional[int] = None,
+        cache_ttl: Optional[float] = None,
+        classifier: Optional[TaskClassifier] = None,
+        bundle: Optional[CompiledBundle] = None,
+        persistent_cache: Optional[PersistentCache] = None
+    ):
         """
         Initialize prompt generator.
 
         Args:
             templates_dir: Directory containing template JSON files
+            cache_size: Enables an LRU cache of generated prompts holding this many entries
+            cache_ttl: Optional lifetime of cached prompts in seconds
+            classifier: Task classifier backend (defaults to the rule-based TaskClassifier)
+            bundle: Precompiled templates and lexicons for templates_dir (see load_bundle),
+                used instead of parsing and compiling them here
+            persistent_cache: On-disk second cache tier, consulted after the in-memory
+                cache and shared across restarts and processes
         """
         if templates_dir is None:
             templates_dir = Path(__file__).parent / "templates"
 
         self.templates_dir = Path(templates_dir)
-        self.templates = self._load_templates()
-        self.classifier = TaskClassifier()
-
-    def _load_templates(self) -> Dict[str, Dict]:
-        """Load all template files from templates directory."""
-        templates = {}
+        self.cache = LRUCache(cache_size, cache_ttl) if cache_size else None
+        self.persistent_cache = persistent_cache
+
+        if bundle is not None:
+            # The bundle matches the directory contents; only the mtimes are local
+            self._registry = dataclasses.replace(bundle.registry, signature=directory_signature(self.templates_dir))
+            self.classifier = classifier if classifier is not None else bundle.classifier
+        else:
+            self._registry, errors = TemplateRegistry.load(self.templates_dir, (classifier or TaskClassifier).lexicons())
+            for error in errors:
+                print(error)
+            self.classifier = classifier if classifier is not None else TaskClassifier(self._registry.analyzer)
+
+        self._reload_lock = threading.Lock()
+        self._reload_listeners: List[Callable[[TemplateRegistry], None]] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        self.reload_count = 0
+        self.failed_reload_count = 0
+        self.last_reload_seconds = 0.0
+        self.total_reload_seconds = 0.0
+        self.last_reload_error: Optional[str] = None
+        # Directory signature of the last failed reload, not retried until a file changes again
+        self._failed_signature = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Pickled for worker processes: templates stay compiled, threads are not carried over
+        state = self.__dict__.copy()
+        for name in ("_reload_lock", "_reload_listeners", "_watcher", "_stop_watching"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._reload_lock = threading.Lock()
+        self._reload_listeners = []
+        self._watcher = None
+        self._stop_watching = threading.Event()
+
+    # The current registry is swapped as a whole; these read through to it
+
+    @property
+    def registry(self) -> TemplateRegistry:
+        """Current template registry snapshot."""
+        return self._registry
+
+    @property
+    def templates(self) -> Dict[str, Dict]:
+        return self._registry.templates
+
+    @property
+    def renderers(self):
+        return self._registry.renderers
+
+    @property
+    def extractors(self):
+        return self._registry.extractors
+
+    @property
+    def analyzer(self):
+        return self._registry.analyzer
+
+    @property
+    def templates_fingerprint(self) -> str:
+        return self._registry.fingerprint
+
+    def reload_templates(self) -> bool:
+        """
+        Re-read, validate and compile templates, then swap them in atomically.
 
-        if not self.templates_dir.exists():
-            raise FileNotFoundError(f"Templates directory not found: {self.templates_dir}")
+        In-flight generate() calls finish with the registry they started with.
+        If any template fails to load, the current registry is kept. Cached
+        results stay valid unless their template's version changed.
 
-        for template_file in self.templates_dir.glob("*.json"):
+        Returns:
+            True if a new registry was swapped in
+        """
+        with self._reload_lock:
+            started = time.perf_counter()
             try:
-                with open(template_file, 'r', encoding='utf-8') as f:
-                    template_data = json.load(f)
-                    task_type = template_data.get("task_type")
-                    if task_type:
-                        templates[task_type] = template_data
+                registry, errors = TemplateRegistry.load(self.templates_dir, self.classifier.lexicons())
             except Exception as e:
-                print(f"Error loading template {template_file}: {e}")
+                errors = [f"Error loading templates from {self.templates_dir}: {e}"]
+
+            if errors:
+                self.failed_reload_count += 1
+                self.last_reload_error = "; ".join(errors)
+                print(self.last_reload_error)
+                return False
+
+            self._registry = registry
 
-        return templates
+            self.last_reload_seconds = time.perf_counter() - started
+            self.total_reload_seconds += self.last_reload_seconds
+            self.reload_count += 1
+            self.last_reload_error = None
+
+            for listener in self._reload_listeners:
+                try:
+                    listener(registry)
+                except Exception as e:
+                    print(f"Template reload listener failed: {e}")
+            return True
+
+    def add_reload_listener(self, listener: Callable[[TemplateRegistry], None]) -> None:
+        """Call listener(registry) after every successful template reload."""
+        self._reload_listeners.append(listener)
+
+    def check_for_updates(self) -> bool:
+        """
+        Reload templates if any template file changed (by mtime/size).
+
+        A directory state that failed to load is not reloaded again until a
+        template file changes, so a broken template is reported once.
+
+        Returns:
+            True if a new registry was swapped in
+        """
+        signature = directory_signature(self.templates_dir)
+        if signature in (self._registry.signature, self._failed_signature):
+            return False
+        if self.reload_templates():
+            return True
+        self._failed_signature = signature
+        return False
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        """Poll the templates directory from a background thread and hot-reload changes."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                try:
+                    self.check_for_updates()
+                except Exception as e:
+                    self.last_reload_error = str(e)
+
+        self._watcher = threading.Thread(target=watch, name="template-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """Stop the background template watcher."""
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def reload_stats(self) -> Dict[str, Any]:
+        """Get template reload metrics."""
+        return {
+            "reload_count": self.reload_count,
+            "failed_reload_count": self.failed_reload_count,
+            "last_reload_seconds": self.last_reload_seconds,
+            "total_reload_seconds": self.total_reload_seconds,
+            "last_reload_error": self.last_reload_error,
+            "templates_fingerprint": self._registry.fingerprint,
+            "watching": self._watcher is not None and self._watcher.is_alive()
+        }
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Get hit/miss/eviction counters of the generation cache (None if disabled)."""
+        return self.cache.stats() if self.cache is not None else None
+
+    def persistent_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Get counters of the persistent cache tier (None if disabled)."""
+        return self.persistent_cache.stats() if self.persistent_cache is not None else None
+
+    def warm_cache(self, db, limit: int = 1000) -> int:
+        """
+        Fill the caches with prompts for the most recent distinct inputs in the database.
+
+        Inputs are generated with default options; results already in the
+        persistent tier are loaded instead of regenerated.
+
+        Args:
+            db: PromptDatabase to read history from
+            limit: Maximum number of inputs to warm
+
+        Returns:
+            Number of inputs warmed
+        """
+        if self.cache is None and self.persistent_cache is None:
+            return 0
+
+        inputs = db.get_recent_inputs(limit)
+        registry = self._registry
+        keys = [self._cache_key(registry, text, "", "", None) for text in inputs]
+
+        missing = []
+        for text, key in zip(inputs, keys):
+            result = self._load_persistent(registry, key) if self.persistent_cache is not None else None
+            if result is None:
+                result = self._generate(registry, text, "", "", None)
+                missing.append((key, result))
+            if self.cache is not None:
+                self.cache.set(key, result)
+
+        if missing and self.persistent_cache is not None:
+            self.persistent_cache.set_many(
+                (self._persistent_key(key), dataclasses.asdict(result)) for key, result in missing
+            )
+        return len(inputs)
 
     def generate(
         self,
@@ -64,6 +314,83 @@ class PromptGenerator:
         """
         Generate an optimized prompt from Hebrew text.
 
+        Args:
+            hebrew_text: Input text in Hebrew
+            context: Additional context (optional)
+            instructions: Special instructions (optional)
+            override_task: Optional task type override (visual/textual/technical)
+
+        Returns:
+            GeneratedPrompt object with the generated prompt and metadata.
+            With caching enabled, repeated requests share one result object,
+            which callers should treat as read-only.
+        """
+        # Pin one registry for the whole call so a concurrent reload cannot mix template versions
+        registry = self._registry
+
+        if self.cache is None and self.persistent_cache is None:
+            return self._generate(registry, hebrew_text, context, instructions, override_task)
+
+        key = self._cache_key(registry, hebrew_text, context, instructions, override_task)
+        result = None
+        if self.cache is not None:
+            # An entry rendered from an older template version counts as a stale miss
+            result = self.cache.get(key, is_valid=lambda cached: self._is_current(registry, cached))
+        if result is None:
+            result = self._load_persistent(registry, key) if self.persistent_cache is not None else None
+            if result is None:
+                result = self._generate(registry, hebrew_text, context, instructions, override_task)
+                if self.persistent_cache is not None:
+                    self.persistent_cache.set(self._persistent_key(key), dataclasses.asdict(result))
+            if self.cache is not None:
+                self.cache.set(key, result)
+        return result
+
+    @staticmethod
+    def _cache_key(
+        registry: TemplateRegistry,
+        hebrew_text: str,
+        context: str,
+        instructions: str,
+        override_task: Optional[str]
+    ) -> tuple:
+        return (
+            unicodedata.normalize("NFC", hebrew_text),
+            context,
+            instructions,
+            override_task,
+            # Routing depends on which task types exist; content changes are
+            # caught per template version by _is_current
+            registry.task_types
+        )
+
+    @staticmethod
+    def _is_current(registry: TemplateRegistry, result: GeneratedPrompt) -> bool:
+        """Whether a cached result was rendered from the registry's revision of its template."""
+        return registry.versions.get(result.task_type) == result.template_version
+
+    def _persistent_key(self, key: tuple) -> str:
+        """Stable hash of a cache key; includes the classifier fingerprint since results depend on it."""
+        content = json.dumps([*key, self.classifier.fingerprint(), PERSISTENT_FORMAT], ensure_ascii=False)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _load_persistent(self, registry: TemplateRegistry, key: tuple) -> Optional[GeneratedPrompt]:
+        data = self.persistent_cache.get(
+            self._persistent_key(key),
+            is_valid=lambda cached: registry.versions.get(cached["task_type"]) == cached["template_version"]
+        )
+        return GeneratedPrompt(**data) if data is not None else None
+
+    async def agenerate(
+        self,
+        hebrew_text: str,
+        context: str = "",
+        instructions: str = "",
+        override_task: Optional[str] = None
+    ) -> GeneratedPrompt:
+        """
+        Async generate(): the CPU-bound work runs in a worker thread so the event loop is never blocked.
+
         Args:
             hebrew_text: Input text in Hebrew
             context: Additional context (optional)
@@ -73,30 +400,38 @@ class PromptGenerator:
         Returns:
             GeneratedPrompt object with the generated prompt and metadata
         """
+        return await asyncio.to_thread(self.generate, hebrew_text, context, instructions, override_task)
+
+    def _generate(
+        self,
+        registry: TemplateRegistry,
+        hebrew_text: str,
+        context: str,
+        instructions: str,
+        override_task: Optional[str]
+    ) -> GeneratedPrompt:
+        """Classify, extract variables and render a prompt (uncached)."""
+        # Scan the input once; the classifier and all extractors read from the analysis
+        analysis = registry.analyzer.analyze(hebrew_text)
+
         # Classify task type
-        task_result = self.classifier.classify_task(hebrew_text)
+        task_result = self.classifier.classify_analysis(analysis)
 
         # Use override if provided
         final_task = override_task if override_task else task_result.task_type
 
         # Ensure task type is supported
-        if final_task not in self.templates:
+        if final_task not in registry.templates:
             final_task = "textual"  # Default to textual
 
         # Get template
-        template_data = self.templates[final_task]
+        template_data = registry.templates[final_task]
 
-        # Extract variables from input text
-        variables = self._extract_variables(
-            hebrew_text,
-            task_result,
-            template_data,
-            context,
-            instructions
-        )
+        # Extract the template's variables from the analyzed text
+        variables = registry.extractors[final_task].extract(analysis, task_result, context, instructions)
 
         # Generate prompt from template
-        prompt = self._fill_template(template_data["template"], variables)
+        prompt = registry.renderers[final_task].render(variables)
 
         return GeneratedPrompt(
             prompt=prompt,
@@ -106,228 +441,109 @@ class PromptGenerator:
             variables=variables,
             metadata={
                 "style": task_result.style,
-                "matched_keywords": task_result.metadata.get("matched_keywords", []),
-                "original_text": hebrew_text
-            }
+                "matched_keywords": task_result.metadata.get("matched_keywords", [])
+            },
+            input_text=hebrew_text,
+            template_version=registry.versions[final_task]
         )
 
-    def _extract_variables(
+    def generate_batch(
         self,
-        text: str,
-        task_result: TaskResult,
-        template_data: Dict,
-        context: str,
-        instructions: str
-    ) -> Dict[str, str]:
-        """
-        Extract variables from text to fill template.
+        items: Iterable[BatchItem],
+        workers: int = 1,
+        mode: str = "thread",
+        chunk_size: Optional[int] = None,
+        executor: Optional[Executor] = None
+    ) -> List[BatchResult]:
         """
-        variables = {}
-        task_type = task_result.task_type
-        style = task_result.style
-
-        # Always include context and instructions
-        variables["context"] = context if context else "[to be specified]"
-        variables["instructions"] = instructions if instructions else "[to be specified]"
-
-        if task_type == "visual":
-            # Visual template variables
-            variables["subject"] = self._extract_subject(text)
-            variables["visual_style"] = self._detect_visual_style(text)
-            variables["lighting"] = "[to be specified]"
-            variables["composition"] = "[to be specified]"
-            variables["quality"] = self._detect_quality(text)
-
-        elif task_type == "textual":
-            # Textual template variables
-            variables["purpose"] = self._extract_purpose(text)
-            variables["recipient"] = self._extract_recipient(text)
-            variables["tone"] = self._map_tone(style.get("tone", "neutral"), style.get("formality", "neutral"))
-            variables["length"] = self._map_length(style.get("length", "moderate"))
-            variables["key_points"] = self._extract_key_points(text)
-
-        elif task_type == "technical":
-            # Technical template variables
-            variables["language"] = self._detect_language(text)
-            variables["environment"] = self._detect_environment(text)
-            variables["functionality"] = self._extract_functionality(text)
-            variables["optimization"] = self._detect_optimization(text)
-
-        return variables
-
-    def _fill_template(self, template: str, variables: Dict[str, str]) -> str:
-        """Fill template with variables using $$ $$ markers."""
-        filled = template
-
-        for key, value in variables.items():
-            placeholder = "$$" + key + "$$"
-            filled = filled.replace(placeholder, value)
-
-        # Remove any unfilled placeholders (leave [to be specified] as is)
-        import re
-        filled = re.sub(r'\$\$[^$]+\$\$', '[to be specified]', filled)
-
-        return filled
-
-    # Helper methods for variable extraction
-
-    def _extract_subject(self, text: str) -> str:
-        """Extract main subject from text for visual prompts."""
-        # Remove common instruction words
-        clean_text = text.replace("צור", "").replace("תמונה", "").replace("של", "").strip()
-        return clean_text if clean_text else "[to be specified]"
-
-    def _detect_visual_style(self, text: str) -> str:
-        """Detect visual style from text."""
-        styles = {
-            "ריאליסטי": "Photo-realistic",
-            "אמנות דיגיטלית": "Digital Art",
-            "סקיצה": "Concept Sketch",
-            "3d": "3D Render",
-            "צבעי מים": "Watercolor",
-            "מינימליסטי": "Minimalist"
-        }
-
-        for heb, eng in styles.items():
-            if heb in text.lower():
-                return eng
-
-        return "[to be specified]"
-
-    def _detect_quality(self, text: str) -> str:
-        """Detect quality requirements."""
-        if "4k" in text.lower() or "גבוהה" in text:
-            return "4K, Ultra Detailed"
-        elif "קולנועי" in text or "cinematic" in text.lower():
-            return "Cinematic, Professional Grade"
-        return "[to be specified]"
-
-    def _extract_purpose(self, text: str) -> str:
-        """Extract purpose from textual request."""
-        purposes = {
-            "סכם": "Summarize",
-            "הסבר": "Explain",
-            "בקש": "Request",
-            "דווח": "Report",
-            "שכנע": "Persuade",
-            "מידע": "Inform"
-        }
-
-        for heb, eng in purposes.items():
-            if heb in text:
-                return eng
-
-        return "[to be specified]"
-
-    def _extract_recipient(self, text: str) -> str:
-        """Extract recipient from text."""
-        recipients = {
-            "מורה": "Teacher",
-            "מנהל": "Boss/Manager",
-            "עמית": "Colleague",
-            "לקוח": "Customer",
-            "קהל": "General Audience"
-        }
-
-        for heb, eng in recipients.items():
-            if heb in text:
-                return eng
-
-        return "[to be specified]"
+        Generate prompts for many requests, optionally in parallel.
 
-    def _map_tone(self, tone: str, formality: str) -> str:
-        """Map detected tone and formality to English description."""
-        tone_map = {
-            "professional": "Professional",
-            "friendly": "Friendly",
-            "urgent": "Urgent",
-            "persuasive": "Persuasive",
-            "informative": "Informative"
-        }
+        Args:
+            items: Hebrew texts, or mappings with hebrew_text and optional
+                context, instructions and override_task
+            workers: Number of worker threads/processes (1 = run inline)
+            mode: "thread" or "process"; process workers receive a pickled copy
+                of this generator once, so templates are not re-parsed per task
+            chunk_size: Items sent to a worker at a time (default: about four chunks per worker)
+            executor: Pool from batch_executor to use (and leave running) instead
+                of starting one for this call; mode then follows the pool type
 
-        formality_map = {
-            "formal": "Formal",
-            "casual": "Casual",
-            "neutral": "Professional"
-        }
+        Returns:
+            One BatchResult per item, in input order; a failing item sets
+            error instead of aborting the batch
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown batch mode: {mode} (expected 'thread' or 'process')")
 
-        mapped_tone = tone_map.get(tone, formality_map.get(formality, "Professional"))
-        return mapped_tone
+        items = list(items)
+        if workers <= 1 or len(items) <= 1:
+            return self._generate_chunk(items)
 
-    def _map_length(self, length: str) -> str:
-        """Map length preference to English description."""
-        length_map = {
-            "concise": "Concise (1-2 paragraphs)",
-            "moderate": "Moderate (3-5 paragraphs)",
-            "extensive": "Extensive (1000+ words)"
-        }
+        if chunk_size is None:
+            chunk_size = max(1, math.ceil(len(items) / (workers * 4)))
+        chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
 
-        return length_map.get(length, "Moderate (3-5 paragraphs)")
-
-    def _extract_key_points(self, text: str) -> str:
-        """Extract key points to cover."""
-        # For now, return the original request
-        # In production, this could use NLP to extract specific points
-        return text if text else "[to be specified]"
-
-    def _detect_language(self, text: str) -> str:
-        """Detect programming language from text."""
-        languages = {
-            "פייתון": "Python",
-            "python": "Python",
-            "javascript": "JavaScript",
-            "js": "JavaScript",
-            "java": "Java",
-            "sql": "SQL",
-            "c++": "C++",
-            "bash": "Bash",
-            "latex": "LaTeX"
-        }
+        if executor is not None:
+            return self._map_chunks(executor, chunks)
+        with self.batch_executor(workers, mode) as executor:
+            return self._map_chunks(executor, chunks)
 
-        text_lower = text.lower()
-        for key, lang in languages.items():
-            if key in text_lower:
-                return lang
-
-        return "[to be specified]"
-
-    def _detect_environment(self, text: str) -> str:
-        """Detect framework/environment from text."""
-        environments = {
-            "react": "React",
-            "django": "Django",
-            "flask": "Flask",
-            "node": "Node.js",
-            "jupyter": "Jupyter Notebook",
-            "console": "Console Only"
-        }
+    def batch_executor(self, workers: int, mode: str = "thread") -> Executor:
+        """
+        Start a worker pool for generate_batch that can be reused across calls.
 
-        text_lower = text.lower()
-        for key, env in environments.items():
-            if key in text_lower:
-                return env
-
-        return "[to be specified]"
-
-    def _extract_functionality(self, text: str) -> str:
-        """Extract required functionality."""
-        # Return the original request as functionality description
-        return text if text else "[to be specified]"
-
-    def _detect_optimization(self, text: str) -> str:
-        """Detect optimization requirements."""
-        optimizations = {
-            "מהיר": "Optimize for speed",
-            "קריא": "Optimize for readability",
-            "זיכרון": "Optimize for low memory usage",
-            "ביצועים": "Optimize for performance"
-        }
+        Starting a process pool (and sending it this generator) is costly, so
+        callers generating many batches should create one pool and pass it to
+        every generate_batch call. Process workers are spawned rather than
+        forked: each one unpickles its own copy of the generator, so caches
+        start with fresh locks and the persistent cache opens its own
+        connection instead of inheriting the parent's. Workers keep that
+        copy, including its templates.
 
-        for heb, eng in optimizations.items():
-            if heb in text:
-                return eng
+        Args:
+            workers: Number of worker threads/processes
+            mode: "thread" or "process"
 
-        return "Optimize for readability"
+        Returns:
+            Executor; the caller shuts it down (e.g. with a with block)
+        """
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown batch mode: {mode} (expected 'thread' or 'process')")
+        if mode == "process":
+            return ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self,)
+            )
+        return ThreadPoolExecutor(workers)
+
+    def _map_chunks(self, executor: Executor, chunks: List[List[BatchItem]]) -> List[BatchResult]:
+        """Generate chunks on an executor, concatenating the results in order."""
+        task = _generate_chunk_in_worker if isinstance(executor, ProcessPoolExecutor) else self._generate_chunk
+        results: List[BatchResult] = []
+        for chunk_results in executor.map(task, chunks):
+            results.extend(chunk_results)
+        return results
+
+    def _generate_chunk(self, items: List[BatchItem]) -> List[BatchResult]:
+        """Generate a list of batch items, capturing per-item errors."""
+        results = []
+        for item in items:
+            try:
+                if isinstance(item, str):
+                    prompt = self.generate(item)
+                else:
+                    prompt = self.generate(
+                        item["hebrew_text"],
+                        context=item.get("context") or "",
+                        instructions=item.get("instructions") or "",
+                        override_task=item.get("override_task") or None
+                    )
+                results.append(BatchResult(prompt=prompt))
+            except Exception as e:
+                results.append(BatchResult(error=f"{type(e).__name__}: {e}"))
+        return results
 
     def get_available_templates(self) -> list:
         """Get list of all available templates."""
@@ -0,0 +1,130 @@
+"""Process-wide shared resources - one generator and one database per process."""
+import threading
+from typing import Dict, Optional
+
+from .bundle import load_bundle
+from .cache import PersistentCache
+from .classifier_factory import create_classifier
+from .database import PromptDatabase
+from .prompt_generator import PromptGenerator
+
+# Reentrant: building the generator may warm its cache through get_database()
+_lock = threading.RLock()
+_generator: Optional[PromptGenerator] = None
+_databases: Dict[str, PromptDatabase] = {}
+
+
+def build_generator(watch: bool = True) -> PromptGenerator:
+    """
+    Build the generator described by configuration (bundle, classifier backend, caches).
+
+    Args:
+        watch: Start the template watcher if TEMPLATE_RELOAD_INTERVAL is set
+    """
+    import config
+
+    bundle = load_bundle(config.BUNDLE_PATH, config.TEMPLATES_DIR)
+    generator = PromptGenerator(
+        config.TEMPLATES_DIR,
+        cache_size=config.GENERATION_CACHE_SIZE,
+        cache_ttl=config.GENERATION_CACHE_TTL,
+        classifier=create_classifier(
+            config.CLASSIFIER_BACKEND,
+            config.CLASSIFIER_MODEL_PATH,
+            min_confidence=config.CASCADE_MIN_CONFIDENCE,
+            min_margin=config.CASCADE_MIN_MARGIN,
+            analyzer=bundle.registry.analyzer
+        ),
+        bundle=bundle,
+        persistent_cache=(
+            PersistentCache(config.PERSISTENT_CACHE_PATH, config.PERSISTENT_CACHE_SIZE, config.PERSISTENT_CACHE_TTL)
+            if config.PERSISTENT_CACHE_PATH else None
+        )
+    )
+    if config.GENERATION_CACHE_WARMUP > 0:
+        generator.warm_cache(get_database(), config.GENERATION_CACHE_WARMUP)
+    if watch and config.TEMPLATE_RELOAD_INTERVAL > 0:
+        generator.start_watching(config.TEMPLATE_RELOAD_INTERVAL)
+    return generator
+
+
+def build_database(database_url: Optional[str] = None) -> PromptDatabase:
+    """
+    Build the database handler described by configuration (storage mode, stats table, SQLite profile, write-behind).
+
+    Args:
+        database_url: Database URL (defaults to config.DATABASE_URL)
+    """
+    import config
+
+    database = PromptDatabase(
+        database_url or config.DATABASE_URL,
+        config.PROMPT_STORAGE_MODE,
+        stats_table=config.PROMPT_STATS_TABLE,
+        sqlite_profile=config.SQLITE_PROFILE,
+        sqlite_overrides=config.SQLITE_OVERRIDES
+    )
+    if config.WRITE_BEHIND:
+        database.start_write_behind(
+            config.WRITE_BEHIND_BATCH_SIZE,
+            config.WRITE_BEHIND_INTERVAL_MS / 1000,
+            config.WRITE_BEHIND_QUEUE_SIZE
+        )
+    return database
+
+
+def track_template_revisions(generator: PromptGenerator, db: PromptDatabase) -> None:
+    """Record the generator's template revisions in the database now and after every reload."""
+    db.save_template_revisions(generator.registry.revisions())
+    generator.add_reload_listener(lambda registry: db.save_template_revisions(registry.revisions()))
+
+
+def get_generator() -> PromptGenerator:
+    """
+    Get the process-wide prompt generator, building it on first use.
+
+    The generator only reads its template registry (reloads swap it whole)
+    and its cache is locked, so every session and thread can share it.
+    """
+    global _generator
+    if _generator is None:
+        with _lock:
+            if _generator is None:
+                _generator = build_generator()
+                track_template_revisions(_generator, get_database())
+    return _generator
+
+
+def get_database(database_url: Optional[str] = None) -> PromptDatabase:
+    """
+    Get the process-wide database handler (and its engine/connection pool) for a URL.
+
+    Args:
+        database_url: Database URL (defaults to config.DATABASE_URL)
+    """
+    import config
+
+    if database_url is None:
+        database_url = config.DATABASE_URL
+
+    database = _databases.get(database_url)
+    if database is None:
+        with _lock:
+            database = _databases.get(database_url)
+            if database is None:
+                database = _databases[database_url] = build_database(database_url)
+    return database
+
+
+def reset() -> None:
+    """Drop the shared instances (stops the template watcher, flushes and closes databases)."""
+    global _generator
+    with _lock:
+        if _generator is not None:
+            _generator.stop_watching()
+            if _generator.persistent_cache is not None:
+                _generator.persistent_cache.close()
+            _generator = None
+        for database in _databases.values():
+            database.close()
+        _databases.clear()
@@ -0,0 +1,233 @@
+"""Statistical task classification - multinomial naive Bayes over character n-grams."""
+import argparse
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .task_classifier import TaskClassifier, TaskResult
+from .text_analysis import TextAnalysis, TextAnalyzer
+
+
+class NaiveBayesClassifier(TaskClassifier):
+    """
+    Trainable task classifier backend.
+
+    Scores task types with a multinomial naive Bayes model over character
+    n-grams of the lower-cased input. Style detection and matched keywords
+    still come from the rule lexicons, so results are drop-in compatible
+    with TaskClassifier.
+    """
+
+    def __init__(
+        self,
+        ngram_range: Tuple[int, int] = (2, 4),
+        alpha: float = 1.0,
+        analyzer: Optional[TextAnalyzer] = None
+    ):
+        """
+        Initialize an untrained classifier.
+
+        Args:
+            ngram_range: Smallest and largest character n-gram length
+            alpha: Additive (Laplace) smoothing for n-gram counts
+            analyzer: Existing analyzer to share; its lexicons must include lexicons()
+        """
+        super().__init__(analyzer)
+        self.ngram_range = ngram_range
+        self.alpha = alpha
+        self.classes: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self._log_priors = np.zeros(0)
+        self._log_probs = np.zeros((0, 0))
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether the model has been fitted or loaded."""
+        return bool(self.classes)
+
+    def _ngrams(self, text_lower: str) -> List[str]:
+        """Character n-grams of the padded, lower-cased text."""
+        padded = f" {text_lower} "
+        low, high = self.ngram_range
+        return [
+            padded[start:start + n]
+            for n in range(low, high + 1)
+            for start in range(len(padded) - n + 1)
+        ]
+
+    def fit(self, texts: Sequence[str], labels: Sequence[str]) -> "NaiveBayesClassifier":
+        """
+        Train the model.
+
+        Args:
+            texts: Input texts
+            labels: Task type per text; labels outside get_supported_tasks() are ignored
+
+        Returns:
+            self
+        """
+        supported = set(self.get_supported_tasks())
+        examples = [(text, label) for text, label in zip(texts, labels) if label in supported]
+        if not examples:
+            raise ValueError("No training examples with a supported task type")
+
+        self.classes = sorted({label for _, label in examples})
+        class_index = {label: i for i, label in enumerate(self.classes)}
+
+        vocabulary: Dict[str, int] = {}
+        rows: List[int] = []
+        columns: List[int] = []
+        for text, label in examples:
+            for ngram in self._ngrams(text.lower()):
+                rows.append(class_index[label])
+                columns.append(vocabulary.setdefault(ngram, len(vocabulary)))
+
+        counts = np.zeros((len(self.classes), len(vocabulary)))
+        np.add.at(counts, (rows, columns), 1)
+        smoothed = counts + self.alpha
+
+        class_counts = np.bincount([class_index[label] for _, label in examples], minlength=len(self.classes))
+        self.vocabulary = vocabulary
+        self._log_priors = np.log(class_counts / class_counts.sum())
+        self._log_probs = np.log(smoothed / smoothed.sum(axis=1, keepdims=True))
+        self._fingerprint = None
+        return self
+
+    @classmethod
+    def train_from_database(
+        cls,
+        db,
+        min_rating: float = 4.0,
+        **kwargs
+    ) -> "NaiveBayesClassifier":
+        """
+        Train from well-rated prompts stored in a PromptDatabase.
+
+        Args:
+            db: PromptDatabase to read feedback from
+            min_rating: Minimum rating for a prompt to be used as an example
+            **kwargs: Model options passed to the constructor
+
+        Returns:
+            Trained classifier
+        """
+        examples = db.get_training_examples(min_rating=min_rating)
+        texts = [text for text, _ in examples]
+        labels = [label for _, label in examples]
+        return cls(**kwargs).fit(texts, labels)
+
+    def save(self, path: Path) -> None:
+        """Serialize the model to a compressed .npz file."""
+        if not self.is_trained:
+            raise ValueError("Cannot save an untrained classifier")
+
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                classes=np.array(self.classes),
+                vocabulary=np.array(vocabulary),
+                log_priors=self._log_priors.astype(np.float32),
+                log_probs=self._log_probs.astype(np.float32),
+                ngram_range=np.array(self.ngram_range),
+                alpha=np.array(self.alpha)
+            )
+
+    @classmethod
+    def load(cls, path: Path, analyzer: Optional[TextAnalyzer] = None) -> "NaiveBayesClassifier":
+        """Load a model written by save()."""
+        with np.load(path) as data:
+            classifier = cls(
+                ngram_range=tuple(int(n) for n in data["ngram_range"]),
+                alpha=float(data["alpha"]),
+                analyzer=analyzer
+            )
+            classifier.classes = [str(label) for label in data["classes"]]
+            classifier.vocabulary = {str(ngram): i for i, ngram in enumerate(data["vocabulary"])}
+            classifier._log_priors = data["log_priors"]
+            classifier._log_probs = data["log_probs"]
+        classifier._fingerprint = None
+        return classifier
+
+    def _fingerprint_data(self) -> Any:
+        """Rule lexicons (used for style) plus the model settings and weights."""
+        weights = hashlib.sha256()
+        weights.update("\n".join(sorted(self.vocabulary, key=self.vocabulary.get)).encode("utf-8"))
+        weights.update(np.ascontiguousarray(self._log_priors).tobytes())
+        weights.update(np.ascontiguousarray(self._log_probs).tobytes())
+        return [super()._fingerprint_data(), list(self.ngram_range), self.alpha, self.classes, weights.hexdigest()]
+
+    def predict_proba(self, text_lower: str) -> Dict[str, float]:
+        """Posterior probability of each trained task type."""
+        if not self.is_trained:
+            raise ValueError("Classifier is not trained")
+
+        vocabulary = self.vocabulary
+        columns = [vocabulary[ngram] for ngram in self._ngrams(text_lower) if ngram in vocabulary]
+        scores = self._log_priors + self._log_probs[:, columns].sum(axis=1)
+
+        posteriors = np.exp(scores - scores.max())
+        posteriors /= posteriors.sum()
+        return dict(zip(self.classes, posteriors.tolist()))
+
+    def classify_analysis(self, analysis: TextAnalysis) -> TaskResult:
+        """
+        Classify an already analyzed text with the statistical model.
+
+        Args:
+            analysis: TextAnalysis whose hits include this classifier's lexicons
+
+        Returns:
+            TaskResult with detected task type, posterior confidence, style, and metadata
+        """
+        posteriors = self.predict_proba(analysis.text_lower)
+        detected_task = max(posteriors.items(), key=lambda x: x[1])[0]
+
+        return TaskResult(
+            task_type=detected_task,
+            confidence=posteriors[detected_task],
+            style=self._detect_style(analysis.hits, detected_task),
+            metadata={
+                "matched_keywords": analysis.hits.get("task", {}).get(detected_task, []),
+                "all_scores": posteriors,
+                "backend": "naive_bayes"
+            }
+        )
+
+    def classify_many(self, texts: Iterable[str], chunk_size: int = 4096) -> List[TaskResult]:
+        """
+        Classify many texts with the statistical model.
+
+        The vectorized rule path of TaskClassifier does not apply here, so each
+        text is analyzed and classified on its own.
+
+        Args:
+            texts: Hebrew input texts
+            chunk_size: Unused; kept for signature compatibility
+
+        Returns:
+            TaskResult per text, in input order
+        """
+        return [self.classify_analysis(self.analyzer.analyze(text)) for text in texts]
+
+
+def main(argv: Optional[Iterable[str]] = None) -> None:
+    """Train a model from the prompt database and write it to disk."""
+    import config
+    from .database import PromptDatabase
+
+    parser = argparse.ArgumentParser(description="Train the naive Bayes task classifier from rated prompts")
+    parser.add_argument("--database-url", default=config.DATABASE_URL)
+    parser.add_argument("--output", type=Path, default=config.CLASSIFIER_MODEL_PATH)
+    parser.add_argument("--min-rating", type=float, default=4.0)
+    args = parser.parse_args(argv)
+
+    classifier = NaiveBayesClassifier.train_from_database(PromptDatabase(args.database_url), args.min_rating)
+    classifier.save(args.output)
+    print(f"Saved model with {len(classifier.vocabulary)} n-grams for {classifier.classes} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,30 @@
 """Task classification module - classifies user tasks into visual/textual/technical."""
-import re
-from typing import Dict, Optional
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional
 from dataclasses import dataclass
 
+import numpy as np
+
+from .keyword_index import LexiconHits, Lexicons
+from .text_analysis import TextAnalysis, TextAnalyzer
+
 
 @dataclass
+class _BatchTables:
+    """Keyword -> label matrices used by TaskClassifier.classify_many."""
+    task_types: List[str]
+    task_matrix: np.ndarray
+    task_boosts: np.ndarray
+    task_keyword_positions: Dict[str, Dict[int, List[int]]]
+    formality_matrix: np.ndarray
+    tones: np.ndarray
+    tone_matrix: np.ndarray
+    lengths: np.ndarray
+    length_matrix: np.ndarray
+
+
+@dataclass(slots=True)
 class TaskResult:
     """Result of task classification."""
     task_type: str  # visual, textual, or technical
@@ -13,6 +33,12 @@ class TaskResult:
     metadata: Dict[str, any]
 
 
+def fingerprint_of(data: Any) -> str:
+    """Stable hash of JSON-serializable classifier settings."""
+    content = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
 class TaskClassifier:
     """Rule-based task classifier for Hebrew text - classifies into 3 main categories."""
 
@@ -77,6 +103,75 @@ class TaskClassifier:
         "extensive": ["ארוך", "מפורט", "מקיף", "מעמיק", "1000"],
     }
 
+    def __init__(self, analyzer: Optional[TextAnalyzer] = None):
+        """
+        Compile all keyword and style lexicons into a single automaton.
+
+        Args:
+            analyzer: Existing analyzer to share; its lexicons must include lexicons()
+        """
+        self.analyzer = analyzer if analyzer is not None else TextAnalyzer(self.lexicons())
+        self._lexicon_index = self.analyzer.index
+        self._batch_tables: Optional[_BatchTables] = None
+        self._fingerprint: Optional[str] = None
+
+    def fingerprint(self) -> str:
+        """
+        Hash of everything this classifier's results depend on.
+
+        Used in persistent cache keys, so results cached under another
+        model or configuration are not served.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint_of(self._fingerprint_data())
+        return self._fingerprint
+
+    def _fingerprint_data(self) -> Any:
+        """Settings hashed by fingerprint(); subclasses extend it with their model."""
+        boosts = {task_type: config["confidence_boost"] for task_type, config in self.TASK_PATTERNS.items()}
+        return [type(self).__name__, self.lexicons(), boosts]
+
+    def _get_batch_tables(self) -> "_BatchTables":
+        """Build the keyword -> label matrices of the vectorized batch path on first use."""
+        if self._batch_tables is None:
+            task_types = list(self.TASK_PATTERNS)
+            keyword_positions: Dict[str, Dict[int, List[int]]] = {}
+            for task_type in task_types:
+                positions = keyword_positions[task_type] = {}
+                for position, pattern_id in enumerate(self._lexicon_index.keyword_ids("task", task_type)):
+                    positions.setdefault(pattern_id, []).append(position)
+
+            self._batch_tables = _BatchTables(
+                task_types=task_types,
+                task_matrix=self._membership_matrix("task", task_types),
+                task_boosts=np.array([self.TASK_PATTERNS[task_type]["confidence_boost"] for task_type in task_types]),
+                task_keyword_positions=keyword_positions,
+                formality_matrix=self._membership_matrix("formality", ["formal", "casual"]),
+                tones=np.array(list(self.TONE_INDICATORS)),
+                tone_matrix=self._membership_matrix("tone", list(self.TONE_INDICATORS)),
+                lengths=np.array(list(self.LENGTH_INDICATORS)),
+                length_matrix=self._membership_matrix("length", list(self.LENGTH_INDICATORS))
+            )
+        return self._batch_tables
+
+    def _membership_matrix(self, lexicon: str, labels: List[str]) -> np.ndarray:
+        """Build a (keyword x label) matrix counting how often each keyword is listed per label."""
+        matrix = np.zeros((self._lexicon_index.pattern_count, len(labels)), dtype=np.int32)
+        for column, label in enumerate(labels):
+            for pattern_id in self._lexicon_index.keyword_ids(lexicon, label):
+                matrix[pattern_id, column] += 1
+        return matrix
+
+    @classmethod
+    def lexicons(cls) -> Lexicons:
+        """Get every lexicon the classifier scans for, keyed by lexicon name."""
+        return {
+            "task": {task_type: config["keywords"] for task_type, config in cls.TASK_PATTERNS.items()},
+            "formality": cls.FORMALITY_INDICATORS,
+            "tone": cls.TONE_INDICATORS,
+            "length": cls.LENGTH_INDICATORS,
+        }
+
     def classify_task(self, text: str) -> TaskResult:
         """
         Classify user task from Hebrew text into visual/textual/technical.
@@ -87,22 +182,29 @@ class TaskClassifier:
         Returns:
             TaskResult with detected task type, confidence, style, and metadata
         """
-        text_lower = text.lower()
+        return self.classify_analysis(self.analyzer.analyze(text))
+
+    def classify_analysis(self, analysis: TextAnalysis) -> TaskResult:
+        """
+        Classify an already analyzed text.
+
+        Args:
+            analysis: TextAnalysis whose hits include this classifier's lexicons
+
+        Returns:
+            TaskResult with detected task type, confidence, style, and metadata
+        """
+        # One pass over the text yields task keywords and style indicators together
+        hits = analysis.hits
+        task_hits = hits.get("task", {})
 
         # Calculate confidence scores for each task type
         task_scores = {}
         for task_type, config in self.TASK_PATTERNS.items():
-            score = 0.0
-            matched_keywords = []
-
-            for keyword in config["keywords"]:
-                if keyword.lower() in text_lower:
-                    score += config["confidence_boost"]
-                    matched_keywords.append(keyword)
-
+            matched_keywords = task_hits.get(task_type)
             if matched_keywords:
                 task_scores[task_type] = {
-                    "score": min(score, 1.0),  # Cap at 1.0
+                    "score": min(len(matched_keywords) * config["confidence_boost"], 1.0),  # Cap at 1.0
                     "keywords": matched_keywords
                 }
 
@@ -119,7 +221,7 @@ class TaskClassifier:
             matched_keywords = task_scores[detected_task]["keywords"]
 
         # Detect style (primarily for textual tasks)
-        style = self._detect_style(text_lower, detected_task)
+        style = self._detect_style(hits, detected_task)
 
         return TaskResult(
             task_type=detected_task,
@@ -131,8 +233,105 @@ class TaskClassifier:
             }
         )
 
-    def _detect_style(self, text: str, task_type: str) -> Dict[str, str]:
-        """Detect style attributes from text."""
+    def classify_many(self, texts: Iterable[str], chunk_size: int = 4096) -> List[TaskResult]:
+        """
+        Classify many texts at once.
+
+        Each text is scanned once into a row of a (document x keyword) hit matrix;
+        scores, caps, the winning task and style picks are then computed as array
+        operations per chunk. Results are identical to calling classify_task per text.
+
+        Args:
+            texts: Hebrew input texts
+            chunk_size: Number of texts whose hit matrix is held in memory at once
+
+        Returns:
+            TaskResult per text, in input order
+        """
+        results: List[TaskResult] = []
+        chunk: List[str] = []
+
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) >= chunk_size:
+                results.extend(self._classify_chunk(chunk))
+                chunk = []
+        if chunk:
+            results.extend(self._classify_chunk(chunk))
+
+        return results
+
+    def _classify_chunk(self, texts: List[str]) -> List[TaskResult]:
+        """Vectorized classification of one chunk of texts."""
+        tables = self._get_batch_tables()
+        hit_matrix = np.zeros((len(texts), self._lexicon_index.pattern_count), dtype=np.int32)
+        found_ids = []
+        for row, text in enumerate(texts):
+            found = self._lexicon_index.find_ids(text.lower())
+            found_ids.append(found)
+            if found:
+                hit_matrix[row, list(found)] = 1
+
+        # Task scores: keyword hit counts per task times its boost, capped at 1.0
+        task_counts = hit_matrix @ tables.task_matrix
+        has_hits = task_counts > 0
+        scores = np.minimum(task_counts * tables.task_boosts, 1.0)
+        best = np.argmax(np.where(has_hits, scores, -np.inf), axis=1)
+        any_hits = has_hits.any(axis=1)
+        textual = tables.task_types.index("textual")
+        detected = np.where(any_hits, best, textual)
+        confidences = np.where(any_hits, scores[np.arange(len(texts)), best], 0.5)
+
+        # Style picks (only reported for textual tasks)
+        formality_counts = hit_matrix @ tables.formality_matrix
+        formality = np.select(
+            [formality_counts[:, 0] > formality_counts[:, 1], formality_counts[:, 1] > formality_counts[:, 0]],
+            ["formal", "casual"],
+            "neutral"
+        )
+        tone_counts = hit_matrix @ tables.tone_matrix
+        tone = np.where(tone_counts.max(axis=1) > 0, tables.tones[np.argmax(tone_counts, axis=1)], "neutral")
+        length_counts = hit_matrix @ tables.length_matrix
+        length = np.where(
+            length_counts.max(axis=1) > 0, tables.lengths[np.argmax(length_counts, axis=1)], "moderate"
+        )
+
+        # Materialize TaskResult objects from plain Python lists
+        results = []
+        rows = zip(
+            detected.tolist(), confidences.tolist(), scores.tolist(), has_hits.tolist(),
+            formality.tolist(), tone.tolist(), length.tolist(), found_ids
+        )
+        for task_index, confidence, score_row, hit_row, formality_pick, tone_pick, length_pick, found in rows:
+            task_type = tables.task_types[task_index]
+            keywords = self.TASK_PATTERNS[task_type]["keywords"]
+            positions = tables.task_keyword_positions[task_type]
+            matched_keywords = [
+                keywords[position]
+                for position in sorted(position for pattern_id in found for position in positions.get(pattern_id, ()))
+            ]
+
+            if task_type == "textual":
+                style = {"formality": formality_pick, "tone": tone_pick, "length": length_pick}
+            else:
+                style = {"formality": "neutral", "tone": "neutral", "length": "moderate"}
+
+            results.append(TaskResult(
+                task_type=task_type,
+                confidence=confidence,
+                style=style,
+                metadata={
+                    "matched_keywords": matched_keywords,
+                    "all_scores": {
+                        task: score for task, score, hit in zip(tables.task_types, score_row, hit_row) if hit
+                    }
+                }
+            ))
+
+        return results
+
+    def _detect_style(self, hits: LexiconHits, task_type: str) -> Dict[str, str]:
+        """Detect style attributes from scanned lexicon hits."""
         style = {
             "formality": "neutral",
             "tone": "neutral",
@@ -144,8 +343,9 @@ class TaskClassifier:
             return style
 
         # Detect formality
-        formal_count = sum(1 for indicator in self.FORMALITY_INDICATORS["formal"] if indicator in text)
-        casual_count = sum(1 for indicator in self.FORMALITY_INDICATORS["casual"] if indicator in text)
+        formality_hits = hits.get("formality", {})
+        formal_count = len(formality_hits.get("formal", []))
+        casual_count = len(formality_hits.get("casual", []))
 
         if formal_count > casual_count:
             style["formality"] = "formal"
@@ -153,17 +353,15 @@ class TaskClassifier:
             style["formality"] = "casual"
 
         # Detect tone
-        tone_scores = {}
-        for tone, indicators in self.TONE_INDICATORS.items():
-            tone_scores[tone] = sum(1 for indicator in indicators if indicator in text)
+        tone_hits = hits.get("tone", {})
+        tone_scores = {tone: len(tone_hits.get(tone, [])) for tone in self.TONE_INDICATORS}
 
         if max(tone_scores.values()) > 0:
             style["tone"] = max(tone_scores.items(), key=lambda x: x[1])[0]
 
         # Detect length preference
-        length_scores = {}
-        for length, indicators in self.LENGTH_INDICATORS.items():
-            length_scores[length] = sum(1 for indicator in indicators if indicator in text)
+        length_hits = hits.get("length", {})
+        length_scores = {length: len(length_hits.get(length, [])) for length in self.LENGTH_INDICATORS}
 
         if max(length_scores.values()) > 0:
             style["length"] = max(length_scores.items(), key=lambda x: x[1])[0]
@@ -0,0 +1,113 @@
+"""Template registry - an immutable snapshot of loaded templates and everything compiled from them."""
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .keyword_index import Lexicons
+from .template_renderer import CompiledTemplate
+from .text_analysis import TextAnalyzer
+from .variable_extractor import VariableExtractor
+
+# (file name, mtime_ns, size) of every template file
+DirectorySignature = Tuple[Tuple[str, int, int], ...]
+
+
+def directory_signature(templates_dir: Path) -> DirectorySignature:
+    """Cheap change detector for a templates directory, based on file mtimes and sizes."""
+    entries = []
+    for template_file in sorted(Path(templates_dir).glob("*.json")):
+        stat = template_file.stat()
+        entries.append((template_file.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(entries)
+
+
+def template_version(template_data: Dict) -> str:
+    """Content hash of one template - its revision identifier."""
+    content = json.dumps(template_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def templates_fingerprint(versions: Dict[str, str]) -> str:
+    """Hash a template set (from its per-template versions)."""
+    content = json.dumps(versions, sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class TemplateRegistry:
+    """
+    Loaded templates with their renderers, extractors and the shared analyzer.
+
+    A registry is never modified; reloading builds a new one, so a reader
+    holding a reference always sees one consistent template set.
+    """
+    templates: Dict[str, Dict]
+    renderers: Dict[str, CompiledTemplate]
+    extractors: Dict[str, VariableExtractor]
+    analyzer: TextAnalyzer
+    versions: Dict[str, str]
+    task_types: Tuple[str, ...]
+    fingerprint: str
+    signature: DirectorySignature
+
+    def revisions(self) -> Dict[str, Dict]:
+        """Template data of every loaded template, keyed by version."""
+        return {self.versions[task_type]: data for task_type, data in self.templates.items()}
+
+    @classmethod
+    def load(cls, templates_dir: Path, classifier_lexicons: Lexicons) -> Tuple["TemplateRegistry", List[str]]:
+        """
+        Parse, validate and compile every template file in a directory.
+
+        Args:
+            templates_dir: Directory containing template JSON files
+            classifier_lexicons: Lexicons of the task classifier, compiled into the same analyzer
+
+        Returns:
+            (registry, errors) - templates that fail to load are left out and reported in errors
+        """
+        templates_dir = Path(templates_dir)
+        if not templates_dir.exists():
+            raise FileNotFoundError(f"Templates directory not found: {templates_dir}")
+
+        signature = directory_signature(templates_dir)
+        templates = {}
+        renderers = {}
+        extractors = {}
+        errors = []
+
+        for template_file in sorted(templates_dir.glob("*.json")):
+            try:
+                with open(template_file, 'r', encoding='utf-8') as f:
+                    template_data = json.load(f)
+                    task_type = template_data.get("task_type")
+                    if task_type:
+                        declared_variables = template_data.get("variables", [])
+                        renderers[task_type] = CompiledTemplate(template_data["template"], declared_variables)
+                        extractors[task_type] = VariableExtractor(
+                            task_type,
+                            template_data.get("extraction", {}),
+                            declared_variables
+                        )
+                        templates[task_type] = template_data
+            except Exception as e:
+                errors.append(f"Error loading template {template_file}: {e}")
+
+        lexicons = dict(classifier_lexicons)
+        for extractor in extractors.values():
+            lexicons.update(extractor.lexicons())
+
+        versions = {task_type: template_version(data) for task_type, data in templates.items()}
+        registry = cls(
+            templates=templates,
+            renderers=renderers,
+            extractors=extractors,
+            analyzer=TextAnalyzer(lexicons),
+            versions=versions,
+            task_types=tuple(sorted(templates)),
+            fingerprint=templates_fingerprint(versions),
+            signature=signature
+        )
+        return registry, errors
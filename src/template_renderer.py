@@ -0,0 +1,73 @@
+"""Template rendering - templates are parsed once into literal and slot segments."""
+import re
+from typing import Dict, List, Optional, Sequence
+
+SLOT_PATTERN = re.compile(r"\$\$([^$]+)\$\$")
+UNSPECIFIED = "[to be specified]"
+
+
+class CompiledTemplate:
+    """A template pre-split into literal text and $$variable$$ slots."""
+
+    def __init__(self, template: str, declared_variables: Optional[Sequence[str]] = None):
+        """
+        Parse template text.
+
+        Args:
+            template: Template text with $$variable$$ markers
+            declared_variables: Variables the template declares; when given, the
+                slots must match them exactly
+
+        Raises:
+            ValueError: If slots and declared variables differ
+        """
+        # re.split with one capture group alternates literal, slot name, literal, ...
+        self.parts: List[str] = SLOT_PATTERN.split(template)
+        self.slots: List[str] = self.parts[1::2]
+
+        if declared_variables is not None:
+            undeclared = set(self.slots) - set(declared_variables)
+            unused = set(declared_variables) - set(self.slots)
+            if undeclared or unused:
+                raise ValueError(
+                    f"Template slots do not match declared variables "
+                    f"(undeclared: {sorted(undeclared)}, unused: {sorted(unused)})"
+                )
+
+    def render(self, variables: Dict[str, str]) -> str:
+        """Fill every slot in one join; slots without a value become [to be specified]."""
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = variables.get(parts[i], UNSPECIFIED)
+        return "".join(parts)
+
+    def match(self, text: str) -> Optional[Dict[str, str]]:
+        """
+        Recover slot values from text rendered by this template.
+
+        Literal segments are matched left to right and each slot takes the
+        text up to the next literal. The result is only returned if
+        rendering it reproduces text exactly.
+
+        Returns:
+            Slot values, or None if text was not rendered from this template
+        """
+        literals = self.parts[0::2]
+        if not text.startswith(literals[0]):
+            return None
+
+        variables: Dict[str, str] = {}
+        position = len(literals[0])
+        for slot, literal in zip(self.slots, literals[1:]):
+            if literal:
+                end = text.find(literal, position)
+                if end < 0:
+                    return None
+            else:
+                end = len(text)
+            value = text[position:end]
+            if variables.setdefault(slot, value) != value:
+                return None
+            position = end + len(literal)
+
+        return variables if self.render(variables) == text else None
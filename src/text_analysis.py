@@ -0,0 +1,52 @@
+"""Text analysis - normalizes and scans an input once for the classifier and extractors."""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from .keyword_index import LexiconHits, LexiconIndex, Lexicons
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+@dataclass(slots=True)
+class TextAnalysis:
+    """Input text analyzed once: lowered text, token spans and hits against every lexicon."""
+    text: str
+    text_lower: str
+    hits: LexiconHits
+    _tokens: Optional[List[Tuple[int, int]]] = field(default=None, repr=False, compare=False)
+
+    @property
+    def tokens(self) -> List[Tuple[int, int]]:
+        """(start, end) spans of word tokens in text_lower, computed on first use."""
+        if self._tokens is None:
+            self._tokens = [match.span() for match in TOKEN_PATTERN.finditer(self.text_lower)]
+        return self._tokens
+
+    def matched(self, lexicon: str, label: str) -> List[str]:
+        """Get the keywords of a lexicon label that occur in the text."""
+        return self.hits.get(lexicon, {}).get(label, [])
+
+    def first_label(self, lexicon: str, default: str = "[to be specified]") -> str:
+        """Get the first label (in declared order) of a lexicon that has any hit."""
+        for label in self.hits.get(lexicon, {}):
+            return label
+        return default
+
+
+class TextAnalyzer:
+    """Compiles lexicons once and turns raw input into a TextAnalysis in a single pass."""
+
+    def __init__(self, lexicons: Lexicons):
+        """
+        Initialize analyzer.
+
+        Args:
+            lexicons: Mapping of lexicon name -> label -> keywords
+        """
+        self.index = LexiconIndex(lexicons)
+
+    def analyze(self, text: str) -> TextAnalysis:
+        """Normalize and scan text against every compiled lexicon."""
+        text_lower = text.lower()
+        return TextAnalysis(text=text, text_lower=text_lower, hits=self.index.scan(text_lower))
@@ -0,0 +1,111 @@
+"""Table-driven variable extraction - compiles a template's declarative extraction spec."""
+from typing import Dict, List, Sequence, Tuple
+
+from .keyword_index import Lexicons
+from .task_classifier import TaskResult
+from .template_renderer import UNSPECIFIED
+from .text_analysis import TextAnalysis
+
+RULE_TYPES = ("lexicon", "input", "style")
+
+
+class VariableExtractor:
+    """
+    Extracts a template's variables according to the "extraction" section of its JSON.
+
+    Each variable maps to one rule:
+        {"type": "lexicon", "values": {value: [keywords]}, "default": ...}
+            first declared value with a keyword in the text
+        {"type": "input", "remove": [words]}
+            the input text, optionally with words removed
+        {"type": "style", "lookup": [{"field": ..., "values": {...}}], "default": ...}
+            first style field whose detected value is listed
+    Declared variables without a rule are left as [to be specified].
+    """
+
+    def __init__(self, task_type: str, spec: Dict[str, Dict], declared_variables: Sequence[str]):
+        """
+        Compile an extraction spec.
+
+        Args:
+            task_type: Task type of the template (namespaces its lexicons)
+            spec: Variable -> rule mapping from the template JSON
+            declared_variables: The template's declared variables
+
+        Raises:
+            ValueError: If a rule targets an undeclared variable or has an unknown type
+        """
+        self.task_type = task_type
+        self.declared_variables = list(declared_variables)
+        self._lexicons: Lexicons = {}
+        self._rules: List[Tuple[str, str, object]] = []
+
+        for variable, rule in spec.items():
+            if variable not in self.declared_variables:
+                raise ValueError(f"Extraction rule for undeclared variable: {variable}")
+
+            rule_type = rule.get("type")
+            if rule_type == "lexicon":
+                lexicon = self.lexicon_name(variable)
+                self._lexicons[lexicon] = rule["values"]
+                self._rules.append((variable, rule_type, (lexicon, rule.get("default", UNSPECIFIED))))
+            elif rule_type == "input":
+                self._rules.append((variable, rule_type, tuple(rule.get("remove", []))))
+            elif rule_type == "style":
+                lookup = tuple((entry["field"], entry["values"]) for entry in rule["lookup"])
+                self._rules.append((variable, rule_type, (lookup, rule.get("default", UNSPECIFIED))))
+            else:
+                raise ValueError(f"Unknown extraction rule type for {variable}: {rule_type} (expected {RULE_TYPES})")
+
+    def lexicon_name(self, variable: str) -> str:
+        """Name under which a variable's lexicon is compiled into the shared analyzer."""
+        return f"{self.task_type}.{variable}"
+
+    def lexicons(self) -> Lexicons:
+        """Lexicons this extractor needs scanned into every TextAnalysis."""
+        return self._lexicons
+
+    def extract(
+        self,
+        analysis: TextAnalysis,
+        task_result: TaskResult,
+        context: str,
+        instructions: str
+    ) -> Dict[str, str]:
+        """
+        Evaluate all rules against an analyzed text.
+
+        Args:
+            analysis: TextAnalysis scanned with this extractor's lexicons
+            task_result: Classification result (for style rules)
+            context: Additional context (optional)
+            instructions: Special instructions (optional)
+
+        Returns:
+            Value for every declared variable
+        """
+        variables = dict.fromkeys(self.declared_variables, UNSPECIFIED)
+        variables["context"] = context if context else UNSPECIFIED
+        variables["instructions"] = instructions if instructions else UNSPECIFIED
+
+        for variable, rule_type, params in self._rules:
+            if rule_type == "lexicon":
+                lexicon, default = params
+                variables[variable] = analysis.first_label(lexicon, default)
+            elif rule_type == "input":
+                text = analysis.text
+                for word in params:
+                    text = text.replace(word, "")
+                text = text.strip() if params else text
+                variables[variable] = text if text else UNSPECIFIED
+            else:
+                lookup, default = params
+                value = default
+                for field, values in lookup:
+                    detected = task_result.style.get(field)
+                    if detected in values:
+                        value = values[detected]
+                        break
+                variables[variable] = value
+
+        return variables
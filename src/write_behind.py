@@ -0,0 +1,165 @@
+"""Write-behind buffering - queues writes and commits them in batches from a background thread."""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# Queued marker that stops the writer thread
+_STOP = object()
+
+
+class WriteBehindWriter:
+    """
+    Bounded queue of pending writes drained by one background thread.
+
+    The writer takes up to batch_size items, waiting at most flush_interval
+    seconds after the first for more, and hands them to write_batch as one
+    batch. If a batch still fails after its retries, its items are written
+    one by one so a single bad item does not take the others with it.
+    put() blocks while the queue is full, so a stalled database slows
+    producers down instead of growing memory without bound.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Any]], None],
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        max_queue: int = 10000,
+        retries: int = 3
+    ):
+        """
+        Initialize and start the writer thread.
+
+        Args:
+            write_batch: Writes a list of items in one transaction
+            batch_size: Maximum items per batch
+            flush_interval: Seconds to wait for a batch to fill
+            max_queue: Maximum pending items before put() blocks
+            retries: Attempts per batch (and per item after a failed batch)
+        """
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self._queue: "queue.Queue[Any]" = queue.Queue(max_queue)
+        # Items are numbered in queue order; flush() waits for a number, not an empty queue
+        self._put_lock = threading.Lock()
+        self._queued = 0
+        self._done = 0
+        self._done_changed = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def put(self, item: Any) -> None:
+        """Queue an item for writing (blocks while the queue is full)."""
+        if self._closed:
+            raise RuntimeError("Write-behind writer is closed")
+        with self._put_lock:
+            self._queue.put(item)
+            self._queued += 1
+
+    def pending(self) -> int:
+        """Number of items queued or being written."""
+        with self._done_changed:
+            return self._queued - self._done
+
+    def flush(self) -> None:
+        """Block until every item queued before this call has been written (or has failed)."""
+        target = self._queued
+        with self._done_changed:
+            self._done_changed.wait_for(lambda: self._done >= target)
+
+    def close(self) -> None:
+        """Write all queued items and stop the writer thread."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue and flush counters."""
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "written": self.written,
+                "batches": self.batches,
+                "failed": self.failed,
+                "last_error": self.last_error,
+                "average_flush_ms": self.flush_seconds_total / self.batches * 1000 if self.batches else 0.0,
+                "max_flush_ms": self.flush_seconds_max * 1000
+            }
+
+    def _next_batch(self) -> Optional[List[Any]]:
+        """Block for one item, then gather more until the batch is full or flush_interval passes."""
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Handled after this batch: put it back for the next round
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._write(batch)
+            finally:
+                with self._done_changed:
+                    self._done += len(batch)
+                    self._done_changed.notify_all()
+
+    def _attempt(self, items: List[Any]) -> Optional[Exception]:
+        """Write items, retrying with backoff; the last error, or None on success."""
+        for attempt in range(self.retries):
+            try:
+                self.write_batch(items)
+                return None
+            except Exception as e:
+                error = e
+                if attempt + 1 < self.retries:
+                    time.sleep(0.01 * 2 ** attempt)
+        return error
+
+    def _write(self, batch: List[Any]) -> None:
+        started = time.perf_counter()
+        error = self._attempt(batch)
+        if error is None:
+            errors = []
+        elif len(batch) == 1:
+            errors = [error]
+        else:
+            errors = [item_error for item_error in map(self._attempt, ([item] for item in batch)) if item_error is not None]
+        elapsed = time.perf_counter() - started
+
+        with self._stats_lock:
+            self.batches += 1
+            self.flush_seconds_total += elapsed
+            self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+            self.written += len(batch) - len(errors)
+            self.failed += len(errors)
+            if errors:
+                self.last_error = f"{type(errors[-1]).__name__}: {errors[-1]}"
@@ -0,0 +1,99 @@
+"""Tests for the batch pipeline."""
+import sys
+import io
+import json
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from batch import run
+from src.database import PromptDatabase
+from src.prompt_generator import PromptGenerator
+
+REQUESTS = [
+    {"hebrew_text": "צור תמונה של חתול בחלל"},
+    "כתוב מייל רשמי למנהל",
+    {"context": "אין טקסט"},
+    {"hebrew_text": "תכנת פונקציה בפייתון", "override_task": "technical"},
+]
+
+
+def _jsonl(records) -> str:
+    return "\n".join(json.dumps(record, ensure_ascii=False) for record in records) + "\n{broken\n"
+
+
+def test_run_streams_batches():
+    """Test that every input record produces one output line, errors included."""
+    generator = PromptGenerator()
+    sink = io.StringIO()
+
+    stats = run(generator, io.StringIO(_jsonl(REQUESTS)), sink, batch_size=2, progress=None)
+
+    lines = [json.loads(line) for line in sink.getvalue().splitlines()]
+    assert [line["offset"] for line in lines] == [0, 1, 2, 3, 4]
+    assert lines[0]["task_type"] == "visual"
+    assert lines[1]["prompt"] == generator.generate("כתוב מייל רשמי למנהל").prompt
+    assert "hebrew_text" in lines[2]["error"]
+    assert lines[3]["task_type"] == "technical"
+    assert "Invalid JSON" in lines[4]["error"]
+    assert stats["processed"] == 5 and stats["errors"] == 2
+    print(f"✓ Batch run test passed: {stats['rate']:.0f} req/s")
+
+
+def test_resume_from_checkpoint():
+    """Test that a run resumes after the checkpointed offset and saves to the database."""
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = Path(tmp) / "run.ckpt"
+        db = PromptDatabase(f"sqlite:///{Path(tmp) / 'batch.db'}")
+        generator = PromptGenerator()
+        csv_input = "hebrew_text,context\nצור תמונה של חתול,\nכתוב מייל למנהל,חופשה\nתכנת פונקציה,\n"
+
+        first = io.StringIO()
+        run(generator, io.StringIO(csv_input), first, input_format="csv", batch_size=2,
+            db=db, checkpoint=checkpoint, progress=None)
+        assert json.loads(checkpoint.read_text())["offset"] == 3
+
+        resumed = io.StringIO()
+        stats = run(generator, io.StringIO(csv_input), resumed, input_format="csv", start_offset=2,
+                    db=db, progress=None)
+
+        lines = [json.loads(line) for line in resumed.getvalue().splitlines()]
+        assert [line["offset"] for line in lines] == [2]
+        assert db.get_prompt_by_id(lines[0]["prompt_id"])["input_text"] == "תכנת פונקציה"
+        assert db.get_statistics()["total_prompts"] == 4
+        assert stats["offset"] == 3
+        print("✓ Checkpoint resume test passed")
+
+
+def test_resume_does_not_save_twice():
+    """Test that replaying a saved batch of the same run returns the stored rows."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PromptDatabase(f"sqlite:///{Path(tmp) / 'batch.db'}")
+        generator = PromptGenerator()
+        csv_input = "hebrew_text\nצור תמונה של חתול\nכתוב מייל למנהל\nתכנת פונקציה\n"
+
+        first = io.StringIO()
+        run(generator, io.StringIO(csv_input), first, input_format="csv", batch_size=2,
+            workers=2, db=db, run_id="run-1", progress=None)
+        # Interrupted before the checkpoint of the last batch: it is processed again
+        replayed = io.StringIO()
+        run(generator, io.StringIO(csv_input), replayed, input_format="csv", start_offset=2,
+            workers=2, db=db, run_id="run-1", progress=None)
+
+        first_ids = [json.loads(line)["prompt_id"] for line in first.getvalue().splitlines()]
+        replayed_ids = [json.loads(line)["prompt_id"] for line in replayed.getvalue().splitlines()]
+        assert replayed_ids == first_ids[2:]
+        assert db.get_statistics()["total_prompts"] == 3
+        print("✓ Idempotent resume test passed")
+
+
+if __name__ == "__main__":
+    print("Running batch pipeline tests...\n")
+
+    test_run_streams_batches()
+    test_resume_from_checkpoint()
+    test_resume_does_not_save_twice()
+
+    print("\n✅ All tests passed!")
@@ -0,0 +1,63 @@
+"""Tests for compiled bundle module."""
+import sys
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.bundle import load_bundle
+from src.prompt_generator import PromptGenerator
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "src" / "templates"
+
+
+def test_bundle_round_trip():
+    """Test that a generator built from a bundle behaves like a freshly compiled one."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bundle.pkl"
+        built = load_bundle(path, TEMPLATES_DIR)
+        assert path.exists()
+
+        loaded = load_bundle(path, TEMPLATES_DIR)
+        assert loaded is not built
+        assert loaded.source_hash == built.source_hash
+        assert loaded.classifier.analyzer is loaded.registry.analyzer
+
+        text = "כתוב מייל רשמי למנהל לבקש חופשה"
+        from_bundle = PromptGenerator(TEMPLATES_DIR, bundle=loaded).generate(text)
+        from_source = PromptGenerator(TEMPLATES_DIR).generate(text)
+        assert from_bundle == from_source
+        print(f"✓ Bundle round trip test passed: {path.stat().st_size} bytes")
+
+
+def test_stale_bundle_is_rebuilt():
+    """Test that changing a template invalidates the bundle."""
+    with tempfile.TemporaryDirectory() as tmp:
+        templates_dir = Path(tmp) / "templates"
+        shutil.copytree(TEMPLATES_DIR, templates_dir)
+        path = Path(tmp) / "bundle.pkl"
+
+        original = load_bundle(path, templates_dir)
+
+        template_file = templates_dir / "visual.json"
+        data = json.loads(template_file.read_text(encoding="utf-8"))
+        data["name"] = "Changed Visual Template"
+        template_file.write_text(json.dumps(data), encoding="utf-8")
+
+        assert load_bundle(path, templates_dir, rebuild=False) is None
+        rebuilt = load_bundle(path, templates_dir)
+        assert rebuilt.source_hash != original.source_hash
+        assert rebuilt.registry.templates["visual"]["name"] == "Changed Visual Template"
+        print("✓ Stale bundle test passed")
+
+
+if __name__ == "__main__":
+    print("Running bundle tests...\n")
+
+    test_bundle_round_trip()
+    test_stale_bundle_is_rebuilt()
+
+    print("\n✅ All tests passed!")
@@ -0,0 +1,98 @@
+"""Tests for cache module."""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cache import LRUCache, PersistentCache
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = LRUCache(maxsize=2)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+    print(f"✓ LRU eviction test passed: {stats}")
+
+
+def test_ttl_expiry():
+    """Test that entries expire after their TTL."""
+    cache = LRUCache(maxsize=10, ttl=0.05)
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.06)
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+    print("✓ TTL expiry test passed")
+
+
+def test_persistent_cache():
+    """Test that the SQLite tier survives reopening and evicts least recently used entries."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cache.db"
+        cache = PersistentCache(path, maxsize=2, sweep_interval=1, touch_interval=0)
+
+        cache.set("a", {"prompt": "א"})
+        time.sleep(0.01)
+        cache.set("b", [1, 2])
+        time.sleep(0.01)
+        assert cache.get("a") == {"prompt": "א"}  # "b" is now least recently used
+        cache.set("c", "x")
+        cache.close()
+
+        reopened = PersistentCache(path, maxsize=2, ttl=60)
+        assert reopened.get("b") is None
+        assert reopened.get("a") == {"prompt": "א"}
+        assert reopened.get("c") == "x"
+        assert len(reopened) == 2
+
+        reopened.ttl = 0.01
+        time.sleep(0.02)
+        assert reopened.get("c") is None
+        assert reopened.stats()["expirations"] == 1
+        reopened.close()
+        print("✓ Persistent cache test passed")
+
+
+def test_stale_entries():
+    """Test that entries rejected by is_valid are dropped and counted as stale misses."""
+    with tempfile.TemporaryDirectory() as tmp:
+        persistent = PersistentCache(Path(tmp) / "cache.db")
+        for cache in (LRUCache(maxsize=10), persistent):
+            cache.set("a", {"version": 1})
+            assert cache.get("a", is_valid=lambda value: value["version"] == 1) == {"version": 1}
+            assert cache.get("a", is_valid=lambda value: value["version"] == 2) is None
+            assert cache.get("a") is None
+
+            stats = cache.stats()
+            assert (stats["hits"], stats["misses"], stats["stale"]) == (1, 2, 1)
+        persistent.close()
+        print("✓ Stale entries test passed")
+
+
+if __name__ == "__main__":
+    print("Running cache tests...\n")
+
+    test_lru_eviction()
+    test_ttl_expiry()
+    test_persistent_cache()
+    test_stale_entries()
+
+    print("\n✅ All tests passed!")
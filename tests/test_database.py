@@ -1,12 +1,17 @@
 """Tests for database module."""
 import sys
+import asyncio
+import sqlite3
+import threading
+import time
 from pathlib import Path
 import os
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.database import PromptDatabase
+from src.database import PromptDatabase, PromptRecord
+from src.prompt_generator import PromptGenerator
 
 
 def test_database_creation():
@@ -103,6 +108,477 @@ def test_history():
         os.remove("test_prompts.db")
 
 
+def test_metadata_does_not_repeat_input():
+    """Test that an input copy in metadata is not written to metadata_json."""
+    test_db = "sqlite:///./test_prompts.db"
+    db = PromptDatabase(test_db)
+
+    prompt_id = db.save_prompt(
+        input_text="כתוב לי מכתב",
+        detected_intent="textual",
+        generated_prompt="prompt",
+        metadata={"original_text": "כתוב לי מכתב", "style": {"tone": "friendly"}}
+    )
+
+    session = db.get_session()
+    try:
+        metadata_json = session.get(PromptRecord, prompt_id).metadata_json
+    finally:
+        session.close()
+    assert metadata_json == '{"style": {"tone": "friendly"}}'
+    assert db.get_prompt_by_id(prompt_id)["input_text"] == "כתוב לי מכתב"
+    print("✓ Metadata dedup test passed")
+
+    # Cleanup
+    db.engine.dispose()
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+
+
+def test_template_versions_and_migration():
+    """Test that an old database gains template_version and revisions are recorded once."""
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+    connection = sqlite3.connect("test_prompts.db")
+    connection.execute(
+        "CREATE TABLE prompts (id INTEGER PRIMARY KEY, input_text TEXT NOT NULL, detected_intent VARCHAR(100) NOT NULL, "
+        "detected_style VARCHAR(50), generated_prompt TEXT NOT NULL, user_feedback VARCHAR(20), rating FLOAT, "
+        "metadata_json TEXT, created_at DATETIME)"
+    )
+    connection.execute("INSERT INTO prompts (input_text, detected_intent, generated_prompt) VALUES ('ישן', 'textual', 'old')")
+    connection.commit()
+    connection.close()
+
+    db = PromptDatabase("sqlite:///./test_prompts.db")
+    generator = PromptGenerator()
+    result = generator.generate("צור תמונה של חתול")
+
+    assert db.save_template_revisions(generator.registry.revisions()) == 3
+    assert PromptDatabase("sqlite:///./test_prompts.db").save_template_revisions(generator.registry.revisions()) == 0
+
+    prompt_id = db.save_prompt(
+        input_text=result.input_text,
+        detected_intent=result.task_type,
+        generated_prompt=result.prompt,
+        template_version=result.template_version
+    )
+    record = db.get_prompt_by_id(prompt_id)
+    revision = db.get_template_revision(record["template_version"])
+    assert revision["template"] == generator.get_template_by_task("visual")
+    assert db.get_prompt_by_id(1)["template_version"] is None
+    print("✓ Template version migration test passed")
+
+    # Cleanup
+    db.engine.dispose()
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+
+
+def test_query_indexes_migration():
+    """Test that an old database gains the query indexes and history uses them."""
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+    connection = sqlite3.connect("test_prompts.db")
+    connection.execute(
+        "CREATE TABLE prompts (id INTEGER PRIMARY KEY, input_text TEXT NOT NULL, detected_intent VARCHAR(100) NOT NULL, "
+        "detected_style VARCHAR(50), generated_prompt TEXT NOT NULL, user_feedback VARCHAR(20), rating FLOAT, "
+        "metadata_json TEXT, created_at DATETIME)"
+    )
+    connection.commit()
+
+    db = PromptDatabase("sqlite:///./test_prompts.db")
+    try:
+        indexes = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert {"ix_prompts_created_at", "ix_prompts_intent_created_at", "ix_prompts_intent_rating"} <= indexes
+
+        plan = connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM prompts WHERE detected_intent = 'visual' ORDER BY created_at DESC LIMIT 50"
+        ).fetchall()
+        assert "ix_prompts_intent_created_at" in plan[0][-1]
+        print("✓ Query indexes migration test passed")
+    finally:
+        connection.close()
+        db.engine.dispose()
+        if os.path.exists("test_prompts.db"):
+            os.remove("test_prompts.db")
+
+
+def test_reference_storage():
+    """Test that reference-mode rows render back to the generated prompt."""
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+    generator = PromptGenerator()
+    results = [generator.generate(text) for text in ["צור תמונה של חתול בחלל", "כתוב מייל רשמי למנהל"]]
+
+    full_db = PromptDatabase("sqlite:///./test_prompts.db")
+    full_db.save_template_revisions(generator.registry.revisions())
+    full_id = full_db.save_prompt(
+        input_text=results[0].input_text,
+        detected_intent=results[0].task_type,
+        generated_prompt=results[0].prompt,
+        template_version=results[0].template_version
+    )
+
+    db = PromptDatabase("sqlite:///./test_prompts.db", storage_mode="reference")
+    reference_id = db.save_prompt(
+        input_text=results[1].input_text,
+        detected_intent=results[1].task_type,
+        generated_prompt=results[1].prompt,
+        template_version=results[1].template_version,
+        variables=results[1].variables
+    )
+
+    edited_id = db.save_prompt(
+        input_text=results[1].input_text,
+        detected_intent=results[1].task_type,
+        generated_prompt=results[1].prompt + "\nEDITED BY USER",
+        template_version=results[1].template_version,
+        variables=results[1].variables
+    )
+
+    try:
+        with db.get_session() as session:
+            stored = session.get(PromptRecord, reference_id)
+            assert stored.generated_prompt == "" and stored.variables_json
+            # A prompt that does not re-render from its variables keeps its full text
+            assert session.get(PromptRecord, edited_id).variables_json is None
+        assert db.get_prompt_by_id(edited_id)["generated_prompt"] == results[1].prompt + "\nEDITED BY USER"
+
+        assert db.get_prompt_by_id(reference_id)["generated_prompt"] == results[1].prompt
+        assert asyncio.run(db.aget_prompt_by_id(reference_id))["generated_prompt"] == results[1].prompt
+
+        # Migration recovers the edit into a slot value, so it still re-renders exactly
+        assert db.migrate_to_reference_storage() == {"converted": 2, "skipped": 0}
+        history = {record["id"]: record["generated_prompt"] for record in db.get_prompt_history()}
+        assert history == {
+            full_id: results[0].prompt,
+            reference_id: results[1].prompt,
+            edited_id: results[1].prompt + "\nEDITED BY USER"
+        }
+        print("✓ Reference storage test passed")
+    finally:
+        asyncio.run(db.aclose())
+        db.engine.dispose()
+        full_db.engine.dispose()
+        if os.path.exists("test_prompts.db"):
+            os.remove("test_prompts.db")
+
+
+def test_stats_table():
+    """Test that the maintained stats table agrees with aggregating the prompts table."""
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+    plain = PromptDatabase("sqlite:///./test_prompts.db")
+    plain.save_prompt("ישן", "textual", "old")
+
+    db = PromptDatabase("sqlite:///./test_prompts.db", stats_table=True)
+    try:
+        ids = db.save_prompts([
+            {"input_text": "צור תמונה", "detected_intent": "visual", "generated_prompt": "a"},
+            {"input_text": "צור ציור", "detected_intent": "visual", "generated_prompt": "b"}
+        ])
+        ids.append(db.save_prompt("כתוב קוד", "technical", "c"))
+        db.update_feedback(ids[0], "good", 5.0)
+        db.update_feedback(ids[0], "good", 4.0)
+        db.update_feedback(ids[2], "bad", 1.0)
+
+        async def rate():
+            await db.aupdate_feedback(ids[1], "good", 3.0)
+            await db.asave_prompt("כתוב מייל", "textual", "d")
+            await db.aclose()
+
+        asyncio.run(rate())
+
+        stats = db.get_statistics()
+        assert stats == plain.get_statistics()
+        assert stats["total_prompts"] == 5 and stats["average_rating"] == 8.0 / 3
+        assert stats["by_intent"]["visual"] == {"prompts": 2, "average_rating": 3.5}
+
+        # Writes by a handler without the stats table are picked up on the next open
+        plain.save_prompt("עוד", "textual", "e")
+        reopened = PromptDatabase("sqlite:///./test_prompts.db", stats_table=True)
+        assert reopened.get_statistics()["total_prompts"] == 6
+        reopened.engine.dispose()
+        print("✓ Stats table test passed")
+    finally:
+        db.engine.dispose()
+        plain.engine.dispose()
+        if os.path.exists("test_prompts.db"):
+            os.remove("test_prompts.db")
+
+
+def test_write_behind():
+    """Test that write-behind saves get IDs at once and are committed by flush and close."""
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+    db = PromptDatabase("sqlite:///./test_prompts.db", stats_table=True)
+    first_id = db.save_prompt("ישן", "textual", "old")
+    db.start_write_behind(batch_size=16, flush_interval=0.01)
+
+    try:
+        ids = [db.save_prompt(f"צור תמונה {i}", "visual", f"prompt {i}") for i in range(40)]
+        ids += db.save_prompts([{"input_text": "כתוב קוד", "detected_intent": "technical", "generated_prompt": "code"}])
+        assert ids == list(range(first_id + 1, first_id + 42))
+
+        # Reads and updates through the handler see queued saves
+        assert db.update_feedback(ids[0], "good", 5.0)
+        assert db.get_prompt_by_id(ids[-1])["generated_prompt"] == "code"
+        assert db.get_statistics()["total_prompts"] == 42
+
+        last_id = db.save_prompt("אחרון", "textual", "last")
+        stats = db.write_behind_stats()
+        assert stats["failed"] == 0 and stats["batches"] >= 1
+        db.close()
+
+        reopened = PromptDatabase("sqlite:///./test_prompts.db")
+        assert reopened.get_prompt_by_id(last_id)["input_text"] == "אחרון"
+        assert reopened.get_prompt_by_id(ids[0])["rating"] == 5.0
+        reopened.engine.dispose()
+        print(f"✓ Write-behind test passed: {stats}")
+    finally:
+        db.close()
+        if os.path.exists("test_prompts.db"):
+            os.remove("test_prompts.db")
+
+
+def test_write_behind_failures_and_flush():
+    """Test that a failing row does not drop its batch and flush does not wait for later saves."""
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+    db = PromptDatabase("sqlite:///./test_prompts.db")
+    db.start_write_behind(batch_size=64, flush_interval=0.05)
+
+    try:
+        try:
+            db.save_prompt(None, "visual", "prompt")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Expected ValueError for a missing input_text")
+
+        # Another writer takes the ID the next queued save was given
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql("INSERT INTO prompts (id, input_text, detected_intent, generated_prompt) VALUES (3, 'x', 'visual', 'x')")
+        ids = [db.save_prompt(f"צור תמונה {i}", "visual", f"prompt {i}") for i in range(20)]
+        db.flush()
+        stats = db.write_behind_stats()
+        assert stats["written"] == 19 and stats["failed"] == 1 and "IntegrityError" in stats["last_error"]
+        assert db.get_prompt_by_id(ids[0])["generated_prompt"] == "prompt 0"
+        assert db.get_prompt_by_id(ids[2])["input_text"] == "x"
+
+        # A flush only covers saves queued before it, so steady saving cannot stall it
+        stop = threading.Event()
+
+        def produce():
+            while not stop.is_set():
+                db.save_prompt("עוד", "textual", "more")
+
+        producer = threading.Thread(target=produce)
+        producer.start()
+        try:
+            time.sleep(0.05)
+            started = time.perf_counter()
+            db.get_prompt_by_id(ids[-1])
+            assert time.perf_counter() - started < 1.0
+        finally:
+            stop.set()
+            producer.join()
+        print("✓ Write-behind failure and flush test passed")
+    finally:
+        db.close()
+        if os.path.exists("test_prompts.db"):
+            os.remove("test_prompts.db")
+
+
+def test_async_save_with_full_write_behind_queue():
+    """Test that asave_prompt waits for queue space without blocking the event loop."""
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+    db = PromptDatabase("sqlite:///./test_prompts.db")
+    db.start_write_behind(batch_size=1, flush_interval=0, max_queue=1)
+    gate = threading.Event()
+    write_rows = db._writer.write_batch
+    db._writer.write_batch = lambda rows: gate.wait() and write_rows(rows)
+
+    async def scenario():
+        db.save_prompt("ראשון", "textual", "first")  # taken by the writer, which waits on the gate
+        time.sleep(0.05)
+        db.save_prompt("שני", "textual", "second")  # fills the queue
+        save = asyncio.ensure_future(db.asave_prompt("שלישי", "textual", "third"))
+        ticks = 0
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+        assert not save.done()
+        gate.set()
+        return ticks, await save
+
+    try:
+        ticks, saved_id = asyncio.run(scenario())
+        assert ticks == 5
+        db.flush()
+        assert db.get_prompt_by_id(saved_id)["input_text"] == "שלישי"
+        print("✓ Async save with full queue test passed")
+    finally:
+        gate.set()
+        db.close()
+        if os.path.exists("test_prompts.db"):
+            os.remove("test_prompts.db")
+
+
+def test_bulk_apis():
+    """Test bulk saves and feedback updates with per-row failures."""
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+    db = PromptDatabase("sqlite:///./test_prompts.db", stats_table=True)
+    try:
+        prompts = [{"input_text": f"צור תמונה {i}", "detected_intent": "visual", "generated_prompt": f"p{i}"} for i in range(5)]
+        prompts[1] = {"input_text": "חסר"}
+        prompts[3]["detected_intent"] = None
+
+        result = db.save_prompts_bulk(iter(prompts), chunk_size=2)
+        assert sorted(result.errors) == [1, 3] and "TypeError" in result.errors[1]
+        assert result.ids[1] is None and result.ids[3] is None
+        assert [db.get_prompt_by_id(result.ids[i])["generated_prompt"] for i in (0, 2, 4)] == ["p0", "p2", "p4"]
+
+        updates = [
+            {"prompt_id": result.ids[0], "feedback": "good", "rating": 5},
+            {"prompt_id": 999, "feedback": "bad"},
+            {"prompt_id": result.ids[2], "feedback": "neutral"},
+            {"prompt_id": result.ids[0], "feedback": "bad", "rating": 2}
+        ]
+        feedback = db.update_feedback_bulk(updates)
+        assert feedback.ids == [result.ids[0], None, result.ids[2], result.ids[0]]
+        assert list(feedback.errors) == [1]
+        assert db.get_prompt_by_id(result.ids[0])["rating"] == 2.0
+        assert db.get_prompt_by_id(result.ids[2])["user_feedback"] == "neutral"
+
+        stats = db.get_statistics()
+        db.rebuild_statistics()
+        assert stats == db.get_statistics() and stats["average_rating"] == 2.0
+
+        # save_prompts goes through the same path but raises on a failed row
+        try:
+            db.save_prompts(prompts[:2])
+        except ValueError as e:
+            assert "1: TypeError" in str(e)
+        else:
+            raise AssertionError("Expected ValueError for a malformed prompt")
+        assert db.get_statistics()["total_prompts"] == 4
+        print("✓ Bulk API test passed")
+    finally:
+        db.engine.dispose()
+        if os.path.exists("test_prompts.db"):
+            os.remove("test_prompts.db")
+
+
+def test_sqlite_profiles():
+    """Test that profile pragmas are applied to every connection and bad values are rejected."""
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+    db = PromptDatabase("sqlite:///./test_prompts.db", sqlite_profile="throughput", sqlite_overrides={"synchronous": "OFF"})
+    try:
+        with db.engine.connect() as connection:
+            assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 0
+            assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+
+        for profile, overrides in [("fastest", None), ("durable", {"page_size": 4096}), ("durable", {"synchronous": "OFF; VACUUM"})]:
+            try:
+                PromptDatabase("sqlite://", sqlite_profile=profile, sqlite_overrides=overrides)
+            except ValueError:
+                continue
+            raise AssertionError(f"Expected ValueError for {profile} {overrides}")
+        print("✓ SQLite profiles test passed")
+    finally:
+        db.engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists("test_prompts.db" + suffix):
+                os.remove("test_prompts.db" + suffix)
+
+
+def test_history_pagination():
+    """Test that cursor pages and the streaming iterator walk the same history."""
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+    db = PromptDatabase("sqlite:///./test_prompts.db")
+    try:
+        db.save_prompts_bulk(
+            {"input_text": f"בקשה {i}", "detected_intent": "visual" if i % 2 else "textual", "generated_prompt": f"p{i}"}
+            for i in range(23)
+        )
+        # A row written without created_at still appears, after all the others
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql(
+                "INSERT INTO prompts (input_text, detected_intent, generated_prompt) VALUES ('ישן', 'visual', 'old')"
+            )
+
+        pages = []
+        cursor = None
+        while True:
+            page = db.get_prompt_history_page(limit=5, cursor=cursor)
+            pages.append([record["input_text"] for record in page["prompts"]])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        walked = [text for page in pages for text in page]
+        assert [len(page) for page in pages] == [5, 5, 5, 5, 4]
+        assert walked == [f"בקשה {i}" for i in range(22, -1, -1)] + ["ישן"]
+        assert [record["input_text"] for record in db.iter_prompt_history(chunk_size=4)] == walked
+        assert [record["input_text"] for record in db.get_prompt_history(limit=3)] == walked[:3]
+
+        assert db.get_prompt_history(limit=0) == []
+        assert db.get_prompt_history_page(limit=0, cursor=cursor) == {"prompts": [], "next_cursor": None}
+
+        visual = db.get_prompt_history_page(limit=20, intent_filter="visual")
+        assert len(visual["prompts"]) == 12 and visual["next_cursor"] is None
+        print("✓ History pagination test passed")
+    finally:
+        db.engine.dispose()
+        if os.path.exists("test_prompts.db"):
+            os.remove("test_prompts.db")
+
+
+def test_async_api():
+    """Test async generation and persistence."""
+    test_db = "sqlite:///./test_prompts.db"
+    db = PromptDatabase(test_db)
+    generator = PromptGenerator()
+
+    async def scenario():
+        results = await asyncio.gather(*(
+            generator.agenerate(text)
+            for text in ["צור תמונה של חתול", "כתוב מייל רשמי", "תכנת פונקציה בפייתון"]
+        ))
+        ids = [
+            await db.asave_prompt(
+                input_text=result.input_text,
+                detected_intent=result.task_type,
+                generated_prompt=result.prompt,
+                metadata={"confidence": result.confidence}
+            )
+            for result in results
+        ]
+        assert await db.aupdate_feedback(ids[0], "good", 5.0)
+        assert not await db.aupdate_feedback(-1, "bad")
+        history = await db.aget_prompt_history(limit=10, intent_filter="visual")
+        await db.aclose()
+        return ids, history
+
+    try:
+        ids, history = asyncio.run(scenario())
+
+        assert [record["id"] for record in history] == [ids[0]]
+        assert history[0]["rating"] == 5.0
+        assert db.get_prompt_by_id(ids[2])["detected_intent"] == "technical"
+        print("✓ Async API test passed")
+    finally:
+        db.engine.dispose()
+        if os.path.exists("test_prompts.db"):
+            os.remove("test_prompts.db")
+
+
 if __name__ == "__main__":
     print("Running database tests...\n")
 
@@ -110,5 +586,17 @@ if __name__ == "__main__":
     test_save_and_retrieve()
     test_feedback()
     test_history()
+    test_metadata_does_not_repeat_input()
+    test_template_versions_and_migration()
+    test_query_indexes_migration()
+    test_reference_storage()
+    test_stats_table()
+    test_write_behind()
+    test_write_behind_failures_and_flush()
+    test_async_save_with_full_write_behind_queue()
+    test_bulk_apis()
+    test_sqlite_profiles()
+    test_history_pagination()
+    test_async_api()
 
     print("\n✅ All tests passed!")
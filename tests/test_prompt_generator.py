@@ -1,10 +1,13 @@
 """Tests for prompt generation module."""
 import sys
+import tempfile
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.cache import PersistentCache
+from src.database import PromptDatabase
 from src.prompt_generator import PromptGenerator
 
 
@@ -71,6 +74,116 @@ def test_template_loading():
         print(f"  - {template['name']} ({template['intent']})")
 
 
+def test_generation_cache():
+    """Test that repeated requests are served from the cache."""
+    generator = PromptGenerator(cache_size=16)
+
+    text = "כתוב מייל רשמי למנהל לבקש חופשה לשבוע הבא"
+    first = generator.generate(text)
+    second = generator.generate(text)
+    other = generator.generate(text, context="עובד במשך 3 שנים")
+
+    assert second is first
+    assert other is not first
+    stats = generator.cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    print(f"✓ Generation cache test passed: {stats}")
+
+
+def test_generation_cache_disabled_by_default():
+    """Test that caching is opt-in."""
+    generator = PromptGenerator()
+
+    assert generator.cache_stats() is None
+    assert generator.generate("עזור לי").prompt == generator.generate("עזור לי").prompt
+    print("✓ Cache opt-in test passed")
+
+
+def test_result_references_input_once():
+    """Test that results are slotted and keep the caller's input string instead of copies."""
+    generator = PromptGenerator()
+    text = "תכנת פונקציה בפייתון למיון רשימה"
+
+    result = generator.generate(text)
+
+    assert not hasattr(result, "__dict__")
+    assert result.input_text is text
+    assert "original_text" not in result.metadata
+    print("✓ Compact result test passed")
+
+
+def test_persistent_cache_tier():
+    """Test that results persist across generators and that history warms the caches."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = Path(tmp) / "cache.db"
+        text = "צור תמונה של חתול בחלל"
+
+        first = PromptGenerator(persistent_cache=PersistentCache(cache_path))
+        expected = first.generate(text)
+        first.persistent_cache.close()
+
+        second = PromptGenerator(cache_size=8, persistent_cache=PersistentCache(cache_path))
+        assert second.generate(text) == expected
+        assert second.persistent_cache_stats()["hits"] == 1
+        assert second.cache_stats()["misses"] == 1
+
+        db = PromptDatabase(f"sqlite:///{Path(tmp) / 'history.db'}")
+        db.save_prompt(input_text="כתוב מייל למנהל", detected_intent="textual", generated_prompt="...")
+        db.save_prompt(input_text=text, detected_intent="visual", generated_prompt="...")
+        assert second.warm_cache(db) == 2
+        assert second.persistent_cache_stats()["size"] == 2
+
+        second.generate("כתוב מייל למנהל")
+        assert second.cache_stats()["hits"] == 1
+        second.persistent_cache.close()
+        db.engine.dispose()
+        print("✓ Persistent cache tier test passed")
+
+
+def test_generate_batch():
+    """Test that batch results keep input order and report failures per item."""
+    generator = PromptGenerator(cache_size=8)
+
+    items = [
+        "צור תמונה של חתול בחלל",
+        {"hebrew_text": "כתוב מייל רשמי למנהל", "context": "חופשה"},
+        {"context": "אין טקסט"},
+        {"hebrew_text": "תכנת פונקציה בפייתון", "override_task": "technical"},
+    ]
+    expected = [
+        generator.generate("צור תמונה של חתול בחלל"),
+        generator.generate("כתוב מייל רשמי למנהל", context="חופשה"),
+        None,
+        generator.generate("תכנת פונקציה בפייתון", override_task="technical"),
+    ]
+
+    for mode in ("thread", "process"):
+        results = generator.generate_batch(items, workers=2, mode=mode, chunk_size=1)
+
+        assert [result.prompt for result in results] == expected
+        assert [result.ok for result in results] == [True, True, False, True]
+        assert results[2].error.startswith("KeyError")
+
+    print("✓ Batch generation test passed")
+
+
+def test_process_workers_open_own_persistent_cache():
+    """Test that spawned workers write the persistent tier through their own connections."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = PersistentCache(Path(tmp) / "cache.db")
+        generator = PromptGenerator(persistent_cache=cache)
+        texts = ["צור תמונה של חתול בחלל", "כתוב מייל רשמי למנהל", "תכנת פונקציה בפייתון"]
+
+        with generator.batch_executor(2, "process") as executor:
+            results = generator.generate_batch(texts, workers=2, chunk_size=1, executor=executor)
+
+        assert all(result.ok for result in results)
+        assert len(cache) == len(texts)
+        cache.close()
+        print("✓ Process worker persistent cache test passed")
+
+
 if __name__ == "__main__":
     print("Running prompt generator tests...\n")
 
@@ -79,5 +192,11 @@ if __name__ == "__main__":
     test_creative_prompt_generation()
     test_email_prompt_generation()
     test_intent_override()
+    test_generation_cache()
+    test_generation_cache_disabled_by_default()
+    test_result_references_input_once()
+    test_persistent_cache_tier()
+    test_generate_batch()
+    test_process_workers_open_own_persistent_cache()
 
     print("\n✅ All tests passed!")
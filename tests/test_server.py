@@ -0,0 +1,125 @@
+"""Tests for the HTTP API and micro-batching."""
+import sys
+import json
+import tempfile
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from server import create_server
+from src import shared
+from src.database import PromptDatabase
+from src.micro_batcher import MicroBatcher
+from src.prompt_generator import PromptGenerator
+
+
+def _request(port: int, method: str, path: str, body=None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connection.request(method, path, json.dumps(body) if body is not None else None)
+    response = connection.getresponse()
+    payload = json.loads(response.read())
+    connection.close()
+    return response.status, payload
+
+
+def test_micro_batcher_groups_writes():
+    """Test that concurrent requests share batches and their saves."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PromptDatabase(f"sqlite:///{Path(tmp) / 'batcher.db'}")
+        generator = PromptGenerator()
+        batcher = MicroBatcher(generator, db, max_batch_size=16, max_wait=0.05, workers=1)
+        try:
+            texts = [f"צור תמונה של חתול {i}" for i in range(32)]
+            futures = [batcher.submit(text) for text in texts]
+            results = [future.result(timeout=10) for future in futures]
+
+            assert [prompt for prompt, _ in results] == [generator.generate(text) for text in texts]
+            assert db.get_prompt_by_id(results[5][1])["input_text"] == texts[5]
+            assert batcher.stats()["batches"] < len(texts)
+            print(f"✓ Micro-batcher test passed: {batcher.stats()}")
+        finally:
+            batcher.close()
+            db.engine.dispose()
+
+
+def test_http_endpoints():
+    """Test generate, feedback, history and stats over HTTP."""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = PromptDatabase(f"sqlite:///{Path(tmp) / 'server.db'}")
+        generator = PromptGenerator()
+        server = create_server(port=0, generator=generator, db=db)
+        assert len(generator._reload_listeners) == 1 and db.get_template_revisions()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        port = server.server_address[1]
+        try:
+            with ThreadPoolExecutor(8) as pool:
+                responses = list(pool.map(
+                    lambda i: _request(port, "POST", "/generate", {"hebrew_text": f"כתוב מייל רשמי {i}"}),
+                    range(8)
+                ))
+            assert all(status == 200 for status, _ in responses)
+            status, generated = responses[0]
+            assert generated["task_type"] == "textual" and generated["prompt_id"]
+
+            status, payload = _request(port, "POST", "/feedback", {"prompt_id": generated["prompt_id"], "feedback": "good", "rating": 5})
+            assert status == 200 and payload["updated"]
+
+            status, payload = _request(port, "GET", "/history?limit=3")
+            assert status == 200 and len(payload["prompts"]) == 3
+            status, payload = _request(port, "GET", f"/history?limit=6&cursor={payload['next_cursor']}")
+            assert len(payload["prompts"]) == 5 and payload["next_cursor"] is None
+            assert _request(port, "GET", "/history?cursor=bogus")[0] == 400
+            status, payload = _request(port, "GET", "/history?limit=0")
+            assert status == 200 and len(payload["prompts"]) == 1
+
+            status, payload = _request(port, "GET", "/stats")
+            assert payload["database"]["total_prompts"] == 8
+            assert payload["batching"]["requests"] == 8
+
+            assert _request(port, "POST", "/generate", {"context": "x"})[0] == 400
+            status, payload = _request(port, "POST", "/generate", {"hebrew_text": "כתוב מייל", "save": "false"})
+            assert status == 400 and "save" in payload["error"]
+            status, payload = _request(port, "POST", "/generate", {"hebrew_text": "כתוב מייל", "save": False})
+            assert status == 200 and payload["prompt_id"] is None
+            assert _request(port, "GET", "/missing")[0] == 404
+            print("✓ HTTP endpoints test passed")
+        finally:
+            server.shutdown()
+            server.server_close()
+            server.service.batcher.close()
+            db.engine.dispose()
+
+
+def test_default_server_records_revisions_once():
+    """Test that the shared generator's reload listener is not registered a second time."""
+    shared.reset()
+    saved = (config.DATABASE_URL, config.BUNDLE_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DATABASE_URL = f"sqlite:///{Path(tmp) / 'prompts.db'}"
+        config.BUNDLE_PATH = Path(tmp) / "compiled_bundle.pkl"
+        try:
+            server = create_server(port=0)
+            assert server.service.generator is shared.get_generator()
+            assert len(server.service.generator._reload_listeners) == 1
+            server.server_close()
+            server.service.batcher.close()
+            print("✓ Default server test passed")
+        finally:
+            shared.reset()
+            config.DATABASE_URL, config.BUNDLE_PATH = saved
+
+
+if __name__ == "__main__":
+    print("Running server tests...\n")
+
+    test_micro_batcher_groups_writes()
+    test_http_endpoints()
+    test_default_server_records_revisions_once()
+
+    print("\n✅ All tests passed!")
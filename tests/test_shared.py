@@ -0,0 +1,61 @@
+"""Tests for process-wide shared resources."""
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import config
+from src import shared
+
+
+def test_generator_is_built_once():
+    """Test that concurrent first calls all get the same generator."""
+    shared.reset()
+    saved = (config.DATABASE_URL, config.BUNDLE_PATH)
+    tmp = tempfile.TemporaryDirectory()
+    # Keep the bundle and template revisions written on first use out of the working tree
+    config.DATABASE_URL = f"sqlite:///{Path(tmp.name) / 'prompts.db'}"
+    config.BUNDLE_PATH = Path(tmp.name) / "compiled_bundle.pkl"
+    try:
+        generators = []
+        threads = [threading.Thread(target=lambda: generators.append(shared.get_generator())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(generators) == 8
+        assert all(generator is generators[0] for generator in generators)
+        assert shared.get_generator().generate("צור תמונה של חתול").task_type == "visual"
+        assert shared.get_database().get_template_revisions()
+        assert config.BUNDLE_PATH.exists()
+        print("✓ Shared generator test passed")
+    finally:
+        shared.reset()
+        config.DATABASE_URL, config.BUNDLE_PATH = saved
+        tmp.cleanup()
+
+
+def test_database_is_shared_per_url():
+    """Test that one database handler (and engine) serves each URL."""
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{Path(tmp) / 'shared.db'}"
+        try:
+            db = shared.get_database(url)
+            assert shared.get_database(url) is db
+            assert shared.get_database(f"sqlite:///{Path(tmp) / 'other.db'}") is not db
+            print("✓ Shared database test passed")
+        finally:
+            shared.reset()
+
+
+if __name__ == "__main__":
+    print("Running shared resources tests...\n")
+
+    test_generator_is_built_once()
+    test_database_is_shared_per_url()
+
+    print("\n✅ All tests passed!")
@@ -0,0 +1,163 @@
+"""Tests for statistical classifier module."""
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.cascade_classifier import CascadeClassifier
+from src.database import PromptDatabase
+from src.prompt_generator import PromptGenerator
+from src.statistical_classifier import NaiveBayesClassifier
+from src.task_classifier import TaskClassifier
+
+TRAINING_DATA = [
+    ("צייר לי חתול כתום על גג", "visual"),
+    ("הכן איור צבעוני של יער", "visual"),
+    ("צייר נוף של הרים בשקיעה", "visual"),
+    ("ממש פונקציה שממיינת מערך", "technical"),
+    ("ממש מחלקה שמנהלת חיבור לשרת", "technical"),
+    ("תקן את השאילתה שמחזירה שגיאה", "technical"),
+    ("נסח בקשה לחופשה למנהלת", "textual"),
+    ("נסח ברכה ליום הולדת לחבר", "textual"),
+    ("נסח תלונה לחברת החשמל", "textual"),
+]
+
+
+def _train() -> NaiveBayesClassifier:
+    texts = [text for text, _ in TRAINING_DATA]
+    labels = [label for _, label in TRAINING_DATA]
+    return NaiveBayesClassifier().fit(texts, labels)
+
+
+def test_naive_bayes_classification():
+    """Test that the model learns phrasing the rule keywords miss."""
+    classifier = _train()
+
+    result = classifier.classify_task("צייר חתול על גג")
+    assert result.task_type == "visual"
+    assert 0.5 < result.confidence <= 1.0
+    assert abs(sum(result.metadata["all_scores"].values()) - 1.0) < 1e-6
+    assert classifier.classify_task("ממש פונקציה למיון").task_type == "technical"
+    assert classifier.classify_task("נסח בקשה למנהל").task_type == "textual"
+    print(f"✓ Naive Bayes classification test passed: {result.confidence:.2f}")
+
+
+def test_naive_bayes_classify_many():
+    """Test that batch classification uses the model, not the rule path."""
+    classifier = _train()
+    texts = [text for text, _ in TRAINING_DATA] + ["צייר חתול על גג"]
+
+    batch = classifier.classify_many(texts)
+    assert [r.task_type for r in batch] == [classifier.classify_task(text).task_type for text in texts]
+    assert all(r.metadata["backend"] == "naive_bayes" for r in batch)
+    print("✓ Naive Bayes classify_many test passed")
+
+
+def test_save_and_load():
+    """Test model serialization round trip."""
+    classifier = _train()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "model.npz"
+        classifier.save(path)
+        loaded = NaiveBayesClassifier.load(path)
+
+        assert loaded.classes == classifier.classes
+        for text, _ in TRAINING_DATA:
+            assert loaded.classify_task(text).task_type == classifier.classify_task(text).task_type
+        print(f"✓ Save/load test passed: {path.stat().st_size} bytes")
+
+
+def test_train_from_database():
+    """Test training from well-rated stored prompts and swapping into the generator."""
+    test_db = "sqlite:///./test_prompts.db"
+    db = PromptDatabase(test_db)
+
+    for text, label in TRAINING_DATA:
+        prompt_id = db.save_prompt(input_text=text, detected_intent=label, generated_prompt="prompt")
+        db.update_feedback(prompt_id, "good", 5.0)
+    prompt_id = db.save_prompt(input_text="צייר משהו", detected_intent="technical", generated_prompt="prompt")
+    db.update_feedback(prompt_id, "bad", 1.0)
+
+    classifier = NaiveBayesClassifier.train_from_database(db, min_rating=4.0)
+    generator = PromptGenerator(classifier=classifier)
+    result = generator.generate("צייר לי ציפור על עץ")
+
+    assert result.task_type == "visual"
+    print("✓ Train from database test passed")
+
+    # Cleanup
+    if os.path.exists("test_prompts.db"):
+        os.remove("test_prompts.db")
+
+
+def test_cascade_early_exit():
+    """Test that decisive keyword hits skip the model and ambiguous inputs reach it."""
+    cascade = CascadeClassifier([("rules", TaskClassifier()), ("naive_bayes", _train())])
+
+    decisive = cascade.classify_task("צור תמונה של חתול בחלל")
+    assert decisive.task_type == "visual"
+    assert decisive.metadata["cascade_stage"] == "rules"
+    assert list(decisive.metadata["stage_latency_ms"]) == ["rules"]
+
+    no_keywords = cascade.classify_task("צייר חתול על גג")
+    assert no_keywords.task_type == "visual"
+    assert no_keywords.metadata["cascade_stage"] == "naive_bayes"
+    assert list(no_keywords.metadata["stage_latency_ms"]) == ["rules", "naive_bayes"]
+
+    # visual 0.4 vs textual 0.3 is too close a margin for the rules to answer alone
+    close_margin = cascade.classify_task("נסח טקסט עם תמונה")
+    assert close_margin.metadata["cascade_stage"] == "naive_bayes"
+    print(f"✓ Cascade test passed: {no_keywords.metadata['stage_latency_ms']}")
+
+
+def test_cascade_classify_many():
+    """Test that batch classification runs the cascade stages per text."""
+    cascade = CascadeClassifier([("rules", TaskClassifier()), ("naive_bayes", _train())])
+    texts = ["צור תמונה של חתול בחלל", "צייר חתול על גג", "נסח טקסט עם תמונה"]
+
+    batch = cascade.classify_many(texts)
+    single = [cascade.classify_task(text) for text in texts]
+    assert [r.task_type for r in batch] == [r.task_type for r in single]
+    assert [r.metadata["cascade_stage"] for r in batch] == ["rules", "naive_bayes", "naive_bayes"]
+    print("✓ Cascade classify_many test passed")
+
+
+def test_fingerprint_tracks_model_and_thresholds():
+    """Test that retraining or changing cascade thresholds changes the persistent cache key."""
+    assert TaskClassifier().fingerprint() == TaskClassifier().fingerprint()
+
+    model = _train()
+    generator = PromptGenerator(classifier=model)
+    key = ("צייר חתול על גג", "", "", None, generator.registry.task_types)
+    before = generator._persistent_key(key)
+    model.fit([text for text, _ in TRAINING_DATA[:6]], [label for _, label in TRAINING_DATA[:6]])
+    assert generator._persistent_key(key) != before
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "model.npz"
+        model.save(path)
+        assert NaiveBayesClassifier.load(path).fingerprint() == NaiveBayesClassifier.load(path).fingerprint()
+
+    cascade = CascadeClassifier([("rules", TaskClassifier()), ("naive_bayes", model)])
+    fingerprint = cascade.fingerprint()
+    cascade.min_margin = 0.5
+    assert cascade.fingerprint() != fingerprint
+    print("✓ Classifier fingerprint test passed")
+
+
+if __name__ == "__main__":
+    print("Running statistical classifier tests...\n")
+
+    test_naive_bayes_classification()
+    test_naive_bayes_classify_many()
+    test_save_and_load()
+    test_train_from_database()
+    test_cascade_early_exit()
+    test_cascade_classify_many()
+    test_fingerprint_tracks_model_and_thresholds()
+
+    print("\n✅ All tests passed!")
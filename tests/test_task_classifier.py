@@ -0,0 +1,118 @@
+"""Tests for task classification module."""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.keyword_index import KeywordAutomaton, LexiconIndex
+from src.task_classifier import TaskClassifier
+from src.text_analysis import TextAnalyzer
+
+
+def test_automaton_finds_overlapping_patterns():
+    """Test that overlapping and nested patterns are all found in one pass."""
+    automaton = KeywordAutomaton(["he", "she", "his", "hers", "java", "javascript"])
+
+    found = automaton.find("ushers write javascript")
+    assert {automaton.patterns[i] for i in found} == {"he", "she", "hers", "java", "javascript"}
+    print("✓ Automaton overlap test passed")
+
+
+def test_lexicon_index_keeps_declared_order():
+    """Test that hits are reported per lexicon in declared keyword order."""
+    index = LexiconIndex({
+        "tone": {"professional": ["מקצועי", "עסקי"]},
+        "formality": {"formal": ["רשמי", "מקצועי"]},
+    })
+
+    hits = index.scan("מכתב עסקי מקצועי ורשמי")
+    assert hits["tone"]["professional"] == ["מקצועי", "עסקי"]
+    assert hits["formality"]["formal"] == ["רשמי", "מקצועי"]
+    assert index.scan("שלום") == {}
+    print("✓ Lexicon index order test passed")
+
+
+def test_text_analysis_single_scan():
+    """Test that one analysis serves the classifier and first-match lookups."""
+    classifier = TaskClassifier()
+    analyzer = TextAnalyzer({
+        **classifier.lexicons(),
+        "language": {"JavaScript": ["javascript", "js"], "Java": ["java"]},
+    })
+
+    analysis = analyzer.analyze("תכנת פונקציה ב-JavaScript")
+
+    assert analysis.first_label("language") == "JavaScript"
+    assert analysis.first_label("environment") == "[to be specified]"
+    assert analysis.tokens[-1] == (15, 25)
+    assert classifier.classify_analysis(analysis) == classifier.classify_task(analysis.text)
+    print("✓ Text analysis test passed")
+
+
+def test_classify_visual_task():
+    """Test classification of a visual request."""
+    classifier = TaskClassifier()
+
+    result = classifier.classify_task("צור תמונה של חתול בחלל")
+
+    assert result.task_type == "visual"
+    assert result.confidence == 0.8
+    assert result.metadata["matched_keywords"] == ["תמונה", "צור תמונה"]
+    print(f"✓ Visual classification test passed: {result.confidence:.2f}")
+
+
+def test_classify_textual_style():
+    """Test style detection for a textual request."""
+    classifier = TaskClassifier()
+
+    result = classifier.classify_task("כתוב מייל רשמי וקצר למנהל")
+
+    assert result.task_type == "textual"
+    assert result.style["formality"] == "formal"
+    assert result.style["length"] == "concise"
+    print(f"✓ Textual style test passed: {result.style}")
+
+
+def test_classify_defaults_to_textual():
+    """Test fallback when no keywords match."""
+    classifier = TaskClassifier()
+
+    result = classifier.classify_task("עזור לי עם משהו")
+
+    assert result.task_type == "textual"
+    assert result.confidence == 0.5
+    assert result.metadata["all_scores"] == {}
+    print("✓ Default classification test passed")
+
+
+def test_classify_many_matches_single():
+    """Test that batch classification returns the same results as classify_task."""
+    classifier = TaskClassifier()
+
+    texts = [
+        "צור תמונה של חתול בחלל",
+        "כתוב מייל רשמי וקצר למנהל",
+        "תכנת פונקציה בפייתון למיון רשימה",
+        "עזור לי עם משהו",
+        "",
+        "כתוב מכתב חברי וקליל, ידידותי ומפורט",
+    ]
+    results = classifier.classify_many(texts, chunk_size=4)
+
+    assert results == [classifier.classify_task(text) for text in texts]
+    print(f"✓ Batch classification test passed: {len(results)} texts")
+
+
+if __name__ == "__main__":
+    print("Running task classifier tests...\n")
+
+    test_automaton_finds_overlapping_patterns()
+    test_lexicon_index_keeps_declared_order()
+    test_text_analysis_single_scan()
+    test_classify_visual_task()
+    test_classify_textual_style()
+    test_classify_defaults_to_textual()
+    test_classify_many_matches_single()
+
+    print("\n✅ All tests passed!")
@@ -0,0 +1,107 @@
+"""Tests for template hot reload."""
+import sys
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.prompt_generator import PromptGenerator
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "src" / "templates"
+
+
+def _edit_template(template_file: Path, **changes) -> None:
+    """Rewrite a template file and move its mtime forward so the change is detected."""
+    data = json.loads(template_file.read_text(encoding="utf-8"))
+    data.update(changes)
+    template_file.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    stat = template_file.stat()
+    os.utime(template_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_reload_swaps_registry():
+    """Test that a changed template is picked up and old snapshots stay intact."""
+    with tempfile.TemporaryDirectory() as tmp:
+        templates_dir = Path(tmp) / "templates"
+        shutil.copytree(TEMPLATES_DIR, templates_dir)
+        generator = PromptGenerator(templates_dir, cache_size=16)
+
+        text = "צור תמונה של חתול בחלל"
+        before = generator.registry
+        generator.generate(text)
+        assert not generator.check_for_updates()
+
+        _edit_template(templates_dir / "visual.json", name="Changed Visual Template")
+        assert generator.check_for_updates()
+
+        assert generator.registry is not before
+        assert before.templates["visual"]["name"] != "Changed Visual Template"
+        assert generator.generate(text).template_used == "Changed Visual Template"
+        assert len(generator.cache) == 1
+        assert generator.reload_stats()["reload_count"] == 1
+        print("✓ Reload swap test passed")
+
+
+def test_broken_template_keeps_registry():
+    """Test that a template that fails validation does not replace the current set."""
+    with tempfile.TemporaryDirectory() as tmp:
+        templates_dir = Path(tmp) / "templates"
+        shutil.copytree(TEMPLATES_DIR, templates_dir)
+        generator = PromptGenerator(templates_dir)
+        before = generator.registry
+
+        _edit_template(templates_dir / "visual.json", template="$$undeclared_variable$$")
+        assert not generator.check_for_updates()
+
+        stats = generator.reload_stats()
+        assert generator.registry is before
+        assert stats["failed_reload_count"] == 1
+        assert "visual.json" in stats["last_reload_error"]
+        assert generator.generate("צור תמונה של חתול").task_type == "visual"
+
+        # Not re-parsed (or reported) again until the file changes
+        assert not generator.check_for_updates()
+        assert generator.reload_stats()["failed_reload_count"] == 1
+        _edit_template(templates_dir / "visual.json", template=before.templates["visual"]["template"])
+        assert generator.check_for_updates()
+        assert generator.reload_stats()["failed_reload_count"] == 1
+        print("✓ Broken template test passed")
+
+
+def test_cache_invalidated_per_template_version():
+    """Test that a template edit only invalidates cached results of that template."""
+    with tempfile.TemporaryDirectory() as tmp:
+        templates_dir = Path(tmp) / "templates"
+        shutil.copytree(TEMPLATES_DIR, templates_dir)
+        generator = PromptGenerator(templates_dir, cache_size=16)
+        versions = dict(generator.registry.versions)
+
+        visual = generator.generate("צור תמונה של חתול")
+        textual = generator.generate("כתוב מייל למנהל")
+        assert visual.template_version == versions["visual"]
+
+        _edit_template(templates_dir / "visual.json", name="Changed Visual Template")
+        assert generator.check_for_updates()
+        assert generator.registry.versions["textual"] == versions["textual"]
+        assert generator.registry.versions["visual"] != versions["visual"]
+
+        assert generator.generate("כתוב מייל למנהל") is textual
+        assert generator.generate("צור תמונה של חתול").template_version == generator.registry.versions["visual"]
+
+        stats = generator.cache_stats()
+        assert (stats["hits"], stats["misses"], stats["stale"]) == (1, 3, 1)
+        print("✓ Per-version cache invalidation test passed")
+
+
+if __name__ == "__main__":
+    print("Running template registry tests...\n")
+
+    test_reload_swaps_registry()
+    test_broken_template_keeps_registry()
+    test_cache_invalidated_per_template_version()
+
+    print("\n✅ All tests passed!")
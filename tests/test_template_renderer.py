@@ -0,0 +1,59 @@
+"""Tests for template renderer module."""
+import sys
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.template_renderer import CompiledTemplate
+
+
+def test_render_fills_slots():
+    """Test rendering with known, repeated and missing variables."""
+    template = CompiledTemplate("Hi $$name$$, re: $$topic$$. Bye $$name$$.", ["name", "topic"])
+
+    assert template.slots == ["name", "topic", "name"]
+    assert template.render({"name": "Dana", "topic": "leave"}) == "Hi Dana, re: leave. Bye Dana."
+    assert template.render({"name": "Dana"}) == "Hi Dana, re: [to be specified]. Bye Dana."
+    print("✓ Render test passed")
+
+
+def test_values_are_not_reparsed():
+    """Test that $$ markers inside variable values are left as typed."""
+    template = CompiledTemplate("Points: $$key_points$$")
+
+    assert template.render({"key_points": "cost $$x$$"}) == "Points: cost $$x$$"
+    print("✓ Literal values test passed")
+
+
+def test_slots_must_match_declared_variables():
+    """Test load-time validation against the declared variables list."""
+    try:
+        CompiledTemplate("Hi $$name$$ $$typo$$", ["name", "topic"])
+    except ValueError as e:
+        assert "typo" in str(e) and "topic" in str(e)
+        print("✓ Validation test passed")
+    else:
+        raise AssertionError("Expected ValueError for mismatched slots")
+
+
+def test_match_recovers_variables():
+    """Test that rendered text maps back to its variables and foreign text does not."""
+    template = CompiledTemplate("Hi $$name$$, re: $$topic$$. Bye $$name$$.", ["name", "topic"])
+    variables = {"name": "Dana", "topic": "annual leave"}
+
+    assert template.match(template.render(variables)) == variables
+    assert template.match("Hi Dana, re: leave. Bye Noa.") is None
+    assert template.match("Something else entirely") is None
+    print("✓ Match test passed")
+
+
+if __name__ == "__main__":
+    print("Running template renderer tests...\n")
+
+    test_render_fills_slots()
+    test_values_are_not_reparsed()
+    test_slots_must_match_declared_variables()
+    test_match_recovers_variables()
+
+    print("\n✅ All tests passed!")
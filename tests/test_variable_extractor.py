@@ -0,0 +1,92 @@
+"""Tests for variable extractor module."""
+import sys
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.prompt_generator import PromptGenerator
+from src.variable_extractor import VariableExtractor
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "src" / "templates"
+
+
+def test_technical_extraction():
+    """Test lexicon, input and default rules of the technical template."""
+    generator = PromptGenerator()
+
+    result = generator.generate("תכנת פונקציה בפייתון ב-django שרצה מהיר")
+
+    assert result.variables["language"] == "Python"
+    assert result.variables["environment"] == "Django"
+    assert result.variables["optimization"] == "Optimize for speed"
+    assert result.variables["functionality"] == "תכנת פונקציה בפייתון ב-django שרצה מהיר"
+    assert result.variables["context"] == "[to be specified]"
+    print(f"✓ Technical extraction test passed: {result.variables['language']}")
+
+
+def test_style_rules():
+    """Test that style rules map detected tone/formality/length."""
+    generator = PromptGenerator()
+
+    result = generator.generate("כתוב מייל רשמי וקצר למנהל")
+
+    assert result.variables["tone"] == "Formal"
+    assert result.variables["length"] == "Concise (1-2 paragraphs)"
+    assert result.variables["recipient"] == "Boss/Manager"
+    print("✓ Style rules test passed")
+
+
+def test_override_uses_template_variables():
+    """Test that an overridden task type is filled with its own template's variables."""
+    generator = PromptGenerator()
+
+    result = generator.generate("כתוב מייל רשמי למנהל", override_task="visual")
+
+    assert result.task_type == "visual"
+    assert result.variables["subject"] == "כתוב מייל רשמי למנהל"
+    assert "purpose" not in result.variables
+    print("✓ Override extraction test passed")
+
+
+def test_new_language_without_code_change():
+    """Test that extending the spec in the template JSON is enough."""
+    with tempfile.TemporaryDirectory() as tmp:
+        templates_dir = Path(tmp) / "templates"
+        shutil.copytree(TEMPLATES_DIR, templates_dir)
+        template_file = templates_dir / "technical.json"
+        data = json.loads(template_file.read_text(encoding="utf-8"))
+        data["extraction"]["language"]["values"]["Rust"] = ["rust", "ראסט"]
+        template_file.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+        generator = PromptGenerator(templates_dir)
+        result = generator.generate("תכנת פונקציה בראסט")
+
+        assert result.variables["language"] == "Rust"
+        print("✓ Spec extension test passed")
+
+
+def test_invalid_spec():
+    """Test that rules for undeclared variables are rejected."""
+    try:
+        VariableExtractor("technical", {"colour": {"type": "input"}}, ["language"])
+    except ValueError as e:
+        assert "colour" in str(e)
+        print("✓ Invalid spec test passed")
+    else:
+        raise AssertionError("Expected ValueError for undeclared variable")
+
+
+if __name__ == "__main__":
+    print("Running variable extractor tests...\n")
+
+    test_technical_extraction()
+    test_style_rules()
+    test_override_uses_template_variables()
+    test_new_language_without_code_change()
+    test_invalid_spec()
+
+    print("\n✅ All tests passed!")